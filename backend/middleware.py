@@ -0,0 +1,139 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger()
+
+# Metrics of the request handled by the current thread, read by the serializer timing
+_local = threading.local()
+
+# Lists of placeholders, e.g. "IN (%s, %s, %s)", differ in length between otherwise identical queries
+PLACEHOLDER_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def get_query_shape(sql: str) -> str:
+    return PLACEHOLDER_LIST.sub("(%s, ...)", sql)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.num_queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.shapes = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - start
+            self.num_queries += 1
+            self.shapes[get_query_shape(sql)] += 1
+
+    def get_repeated_queries(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def timed_data(data: property) -> property:
+    """Wrap the ``data`` property of a serializer class to add the time spent to the metrics of the request."""
+
+    def get_data(self):
+        metrics = getattr(_local, 'metrics', None)
+
+        # Nested serializers are part of the outermost one
+        if metrics is None or metrics.serializing:
+            return data.fget(self)
+
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    get_data.timed = True
+    return property(get_data)
+
+
+def patch_serializers():
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        data = serializer_class.__dict__['data']
+        if not getattr(data.fget, 'timed', False):
+            serializer_class.data = timed_data(data)
+
+
+class InstrumentationMiddleware:
+    """
+    Per-request instrumentation, enabled with the setting ``REQUEST_INSTRUMENTATION``.
+
+    Measures the wall time, the number and duration of database queries and the time spent rendering serializers of
+    each request. The metrics are added as ``Server-Timing`` header and logged as JSON. Queries with the same SQL
+    (apart from the length of placeholder lists) repeated at least ``REQUEST_INSTRUMENTATION_REPEATED_QUERIES``
+    times are logged as a warning, as they usually indicate an N+1 problem.
+
+    The body of streaming responses is produced after the middleware has returned and is not included.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.threshold = settings.REQUEST_INSTRUMENTATION_REPEATED_QUERIES
+        patch_serializers()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+
+        total_time = time.perf_counter() - start
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.num_queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ])
+
+        logger.info(json.dumps(dict(
+            event="request",
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            duration_ms=round(total_time * 1000, 1),
+            db_queries=metrics.num_queries,
+            db_ms=round(metrics.query_time * 1000, 1),
+            serializer_ms=round(metrics.serializer_time * 1000, 1),
+        )))
+
+        for shape, count in metrics.get_repeated_queries(self.threshold):
+            logger.warning(json.dumps(dict(
+                event="repeated_query",
+                method=request.method,
+                path=request.path,
+                count=count,
+                sql=shape,
+            )))
+
+        return response
@@ -30,6 +30,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'backend.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -113,6 +114,13 @@ REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
 }
 
+# CSV import: number of processes parsing the files of an import job in parallel
+IMPORT_PROCESSES = int(os.environ.get("IMPORT_PROCESSES", os.cpu_count() or 1))
+
+# Request instrumentation: Server-Timing header and log of queries, timings and repeated queries (N+1) per request
+REQUEST_INSTRUMENTATION = os.environ.get("REQUEST_INSTRUMENTATION", "").lower() in ("1", "true")
+REQUEST_INSTRUMENTATION_REPEATED_QUERIES = int(os.environ.get("REQUEST_INSTRUMENTATION_REPEATED_QUERIES", 10))
+
 # OIDC configuration
 OIDC_RP_CLIENT_ID = os.environ.get("OIDC_CLIENT_ID")
 OIDC_RP_CLIENT_SECRET = os.environ.get("OIDC_CLIENT_SECRET")
@@ -0,0 +1,27 @@
+from django.db.models import Model
+
+
+def get_attnames(instance: Model, names) -> set[str]:
+    return {instance._meta.get_field(name).attname for name in names}
+
+
+def is_updating(instance: Model, fields: tuple[str, ...], update_fields=None) -> bool:
+    """Whether a save with ``update_fields`` may change any of ``fields``. Saves without ``update_fields`` may."""
+    if update_fields is None:
+        return True
+
+    return not get_attnames(instance, update_fields).isdisjoint(get_attnames(instance, fields))
+
+
+def remember_stored_state(instance: Model, fields: tuple[str, ...]):
+    """
+    Keep the stored values of ``fields`` as ``instance._stored_state`` in a pre_save receiver, for post_save receivers
+    which need to revert the previous state. ``None`` for new instances.
+    """
+    stored = type(instance)._base_manager.filter(pk=instance.pk)
+    instance._stored_state = stored.values(*fields).first() if instance.pk else None
+
+
+def get_state(instance: Model, fields: tuple[str, ...]) -> dict:
+    """Values of ``fields`` converted like when they are stored, e.g. if the instance was saved with strings."""
+    return {name: instance._meta.get_field(name).to_python(getattr(instance, name)) for name in fields}
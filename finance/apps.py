@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FinanceConfig(AppConfig):
     name = 'finance'
     verbose_name = "Finanzen"
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import finance.signals
@@ -0,0 +1,121 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from itertools import islice, takewhile
+
+from finance.models import Record
+
+# Seconds after which the index is rebuilt, to pick up writes of other processes and bulk operations without signals
+INDEX_TTL = 300
+
+MAX_SUGGESTIONS = 10
+
+
+@dataclass
+class SubjectEntry:
+    subject: str
+    count: int
+    category: int | None
+    contract: int | None
+
+
+class SubjectIndex:
+    """
+    In-process prefix index of the distinct record subjects.
+
+    Subjects are kept in a list sorted by their lower-case form, so the subjects starting with a prefix are a slice
+    found by binary search. Each subject has the number of records using it and the category and contract of the
+    record saved last. The index is built lazily, kept up to date by the signals of ``Record`` and rebuilt after
+    ``INDEX_TTL`` seconds.
+    """
+
+    def __init__(self, ttl: int = INDEX_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.keys = []
+        self.entries = {}
+        self.date_loaded = None
+
+    def is_loaded(self) -> bool:
+        return self.date_loaded is not None and time.monotonic() - self.date_loaded < self.ttl
+
+    def invalidate(self):
+        with self.lock:
+            self.date_loaded = None
+
+    def load(self):
+        rows = Record.objects.order_by('date', 'id').values_list('subject', 'category', 'contract')
+
+        entries = {}
+        for subject, category, contract in rows.iterator(chunk_size=5000):
+            entry = entries.get(subject)
+            if entry is None:
+                entries[subject] = SubjectEntry(subject, 1, category, contract)
+            else:
+                entry.count += 1
+                entry.category = category
+                entry.contract = contract
+
+        self.entries = entries
+        self.keys = sorted((subject.lower(), subject) for subject in entries)
+        self.date_loaded = time.monotonic()
+
+    def search(self, prefix: str = "", limit: int = MAX_SUGGESTIONS) -> list[SubjectEntry]:
+        """The ``limit`` most used subjects starting with ``prefix`` (case-insensitive)."""
+        with self.lock:
+            if not self.is_loaded():
+                self.load()
+
+            prefix = prefix.lower()
+            start = bisect_left(self.keys, (prefix,))
+            keys = takewhile(lambda key: key[0].startswith(prefix), islice(self.keys, start, None))
+
+            return heapq.nlargest(
+                limit,
+                (self.entries[subject] for _, subject in keys),
+                key=lambda entry: entry.count,
+            )
+
+    def add(self, record: Record):
+        with self.lock:
+            if not self.is_loaded():
+                return
+
+            entry = self.entries.get(record.subject)
+            if entry is None:
+                self.entries[record.subject] = SubjectEntry(record.subject, 1, record.category_id, record.contract_id)
+                insort(self.keys, (record.subject.lower(), record.subject))
+            else:
+                entry.count += 1
+                entry.category = record.category_id
+                entry.contract = record.contract_id
+
+    def remove(self, subject: str):
+        with self.lock:
+            if not self.is_loaded():
+                return
+
+            entry = self.entries.get(subject)
+            if entry is None:
+                return
+
+            entry.count -= 1
+            if entry.count <= 0:
+                del self.entries[subject]
+                self.keys.pop(bisect_left(self.keys, (subject.lower(), subject)))
+
+    def update(self, old_subject: str, record: Record):
+        if old_subject == record.subject:
+            with self.lock:
+                entry = self.entries.get(record.subject) if self.is_loaded() else None
+                if entry is not None:
+                    entry.category = record.category_id
+                    entry.contract = record.contract_id
+        else:
+            self.remove(old_subject)
+            self.add(record)
+
+
+subject_index = SubjectIndex()
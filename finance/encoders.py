@@ -0,0 +1,190 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+from transactions.models import Transaction
+
+# Fields of RecordSerializer in the order they are rendered ('transactions' is added by encode_records)
+RECORD_FIELDS = (
+    "id",
+    "date_created",
+    "subject",
+    "date",
+    "amount",
+    "account",
+    "counter_booking",
+    "category",
+    "contract",
+)
+
+
+def encode_datetime(value):
+    """Same output as serializers.DateTimeField with the default ISO 8601 format."""
+    if value is None:
+        return None
+
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def encode_date(value):
+    return value.isoformat() if value is not None else None
+
+
+def dump_json(data) -> str:
+    """
+    Dump data consisting of JSON primitives only, same output as the JSONRenderer of the REST framework.
+
+    Without any custom types, the C implementation of the encoder is used for the whole document.
+    """
+    content = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def encode_csv_value(value):
+    """Flatten lists of IDs or nested objects (rendered as their ID) into a comma-separated cell."""
+    if isinstance(value, list):
+        return ",".join(str(item["id"] if isinstance(item, dict) else item) for item in value)
+    return value
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer in streaming responses."""
+
+    def write(self, value):
+        return value
+
+
+def get_transaction_ids(record_ids) -> dict:
+    """IDs of the transactions linked to each record, in the order of Transaction.Meta.ordering."""
+    links = (
+        Transaction.records.through.objects
+        .filter(record_id__in=record_ids)
+        .order_by('transaction__booking_date', 'transaction_id')
+        .values_list('record_id', 'transaction_id')
+    )
+
+    transaction_ids = defaultdict(list)
+    for record_id, transaction_id in links:
+        transaction_ids[record_id].append(transaction_id)
+
+    return transaction_ids
+
+
+def encode_records(rows: list[dict]) -> list[dict]:
+    """Encode rows of ``Record.objects.values(*RECORD_FIELDS)`` like RecordSerializer."""
+    transaction_ids = get_transaction_ids([row["id"] for row in rows])
+
+    return [
+        {
+            "id": row["id"],
+            "transactions": transaction_ids.get(row["id"], []),
+            "date_created": encode_datetime(row["date_created"]),
+            "subject": row["subject"],
+            "date": encode_date(row["date"]),
+            "amount": row["amount"],
+            "account": row["account"],
+            "counter_booking": row["counter_booking"],
+            "category": row["category"],
+            "contract": row["contract"],
+        }
+        for row in rows
+    ]
+
+
+class FastListMixin:
+    """
+    Opt-in fast path for list responses (``?fast=1``).
+
+    Rows are fetched with ``values(*fast_fields)``, converted to JSON primitives by ``encode_rows`` and rendered
+    without instantiating serializers. The output is the same as with the regular serializer.
+    """
+    fast_fields = ()
+
+    def encode_rows(self, rows: list[dict]) -> list[dict]:
+        raise NotImplementedError()
+
+    def get_cursor_fields(self, request, queryset) -> list[str]:
+        """
+        Ordering fields missing from ``fast_fields``, e.g. foreign key columns or annotations. The cursor position is
+        read from the rows, the encoders leave these fields out.
+        """
+        if not isinstance(self.paginator, CursorPagination):
+            return []
+
+        fields = [name.lstrip("-") for name in self.paginator.get_ordering(request, queryset, self)]
+        return [name for name in fields if name not in self.fast_fields]
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("fast") not in ("1", "true"):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        queryset = queryset.values(*self.fast_fields, *self.get_cursor_fields(request, queryset))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = self.get_paginated_response(self.encode_rows(page)).data
+        else:
+            data = self.encode_rows(list(queryset))
+
+        return HttpResponse(dump_json(data).encode(), content_type="application/json")
+
+
+class ExportMixin:
+    """
+    Streaming export of the filtered list (``export`` action) as JSON Lines (default) or CSV (``?exportFormat=csv``).
+
+    Rows are read with a server-side iterator and encoded in chunks of ``export_chunk_size`` with the same encoder as
+    the fast list path, so memory usage does not depend on the number of rows.
+    """
+    export_chunk_size = 2000
+
+    EXPORT_FORMATS = {
+        "jsonl": "application/jsonl",
+        "csv": "text/csv",
+    }
+
+    def iter_export_chunks(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by(*self.cursor_pagination_class.ordering)
+
+        rows = queryset.prefetch_related(None).values(*self.fast_fields).iterator(chunk_size=self.export_chunk_size)
+        while chunk := list(islice(rows, self.export_chunk_size)):
+            yield self.encode_rows(chunk)
+
+    def iter_jsonl(self):
+        for chunk in self.iter_export_chunks():
+            yield "".join(dump_json(row) + "\n" for row in chunk)
+
+    def iter_csv(self):
+        writer = csv.writer(Echo())
+
+        # The encoded rows have the fields of the serializer, known before the first row (if any) is read
+        header = list(self.get_serializer().fields)
+        yield writer.writerow(header)
+
+        for chunk in self.iter_export_chunks():
+            yield "".join(writer.writerow([encode_csv_value(row[field]) for field in header]) for row in chunk)
+
+    @action(detail=False)
+    def export(self, request):
+        export_format = request.query_params.get("exportFormat", "jsonl")
+
+        if export_format not in self.EXPORT_FORMATS:
+            raise ValidationError(f"Export format '{export_format}' does not exist.")
+
+        content = self.iter_csv() if export_format == "csv" else self.iter_jsonl()
+        response = StreamingHttpResponse(content, content_type=self.EXPORT_FORMATS[export_format])
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}.{export_format}"'
+        return response
@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management import BaseCommand
+from django.db import transaction, connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from finance.models import Account, Category, Contract, Record
+from finance.views import RecordViewSet
+
+SUBJECTS = ["Miete", "Strom", "Supermarkt", "Tankstelle", "Versicherung", "Gehalt", "Restaurant", "Apotheke"]
+
+
+def seed(num_records: int):
+    rng = random.Random(0)
+    accounts = [Account.objects.create(name=f"Konto {i}", type="Girokonto") for i in range(5)]
+
+    categories = []
+    for i in range(50):
+        parent = rng.choice(categories) if categories and rng.random() < 0.7 else None
+        categories.append(Category.objects.create(name=f"Benchmark {i}", parent=parent))
+
+    contracts = [
+        Contract.objects.create(
+            name=f"Vertrag {i}",
+            date_start=date(2015, 1, 1),
+            account=rng.choice(accounts),
+            amount=rng.randint(5, 100),
+            payment_date=date(2015, 1, rng.randint(1, 28)),
+            payment_cycle="m",
+            category=rng.choice(categories),
+        )
+        for i in range(30)
+    ]
+
+    Record.objects.bulk_create([
+        Record(
+            account=rng.choice(accounts),
+            subject=f"{rng.choice(SUBJECTS)} {rng.randint(0, 999)}",
+            category=rng.choice(categories),
+            contract=rng.choice(contracts) if rng.random() < 0.1 else None,
+            date=date(2015, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+            amount=rng.randint(-100000, 100000) / 100,
+        )
+        for _ in range(num_records)
+    ], batch_size=5000)
+
+    return accounts[0], categories[0], contracts[0]
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic ledger and report timings and query plans of the record filters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--explain", action="store_true", help="Print the query plan of each filter")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            account, category, contract = seed(options["records"])
+            self.stdout.write(f"Seeded {options['records']} records in {time.perf_counter() - start:.1f}s")
+
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE finance_record")
+
+            record = Record.objects.order_by('id').first()
+            params = {
+                "id": record.pk,
+                "account": account.pk,
+                "date__gte": "2024-06-01",
+                "date__gt": "2024-06-01",
+                "date__lte": "2015-06-01",
+                "date__lt": "2015-06-01",
+                "date": "2020-02-29",
+                "date_created__gte": record.date_created.isoformat(),
+                "date_created__gt": record.date_created.isoformat(),
+                "date_created__lte": record.date_created.isoformat(),
+                "date_created__lt": record.date_created.isoformat(),
+                "date_created": record.date_created.isoformat(),
+                "category": category.pk,
+                "category__subtree": category.pk,
+                "contract": contract.pk,
+                "subject": record.subject,
+                "subject__icontains": "ete 12",
+                "subject__istartswith": "miete 1",
+                "subject__iendswith": " 999",
+                "transaction_count": 0,
+                "transaction_count__gte": 1,
+                "transaction_count__gt": 0,
+                "transaction_count__lte": 0,
+                "transaction_count__lt": 1,
+                "q": "markt 5",
+            }
+
+            for lookup, value in params.items():
+                view = RecordViewSet()
+                view.request = Request(factory.get("/v1/records/", {lookup: value}))
+                qs = view.filter_records(Record.objects.all()).order_by('-date', '-id')
+
+                durations = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    count = qs.count()
+                    list(qs[:50])
+                    durations.append(time.perf_counter() - start)
+
+                self.stdout.write(f"{lookup:>24}: {min(durations) * 1000:8.1f}ms ({count} records)")
+
+                if options["explain"]:
+                    self.stdout.write(qs[:50].explain())
+                    self.stdout.write("")
+
+            transaction.set_rollback(True)
@@ -0,0 +1,102 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from finance.models import Account, Record
+from finance.views import RecordViewSet
+from transactions import models as transactions_models
+from transactions.views import TransactionViewSet
+
+
+def seed(num_rows: int):
+    """Create ``num_rows`` records and transactions, every second transaction linked to a record."""
+    rng = random.Random(0)
+    account = Account.objects.create(name="Benchmark", type="Girokonto")
+    records = Record.objects.bulk_create([
+        Record(
+            account=account,
+            subject=f"Buchung {i}",
+            date=date(2020, 1, 1) + timedelta(days=rng.randint(0, 1500)),
+            amount=rng.randint(-100000, 100000) / 100,
+        )
+        for i in range(num_rows)
+    ])
+
+    bank_account = transactions_models.Account.objects.create(iban="DE00BENCHMARK", name="Benchmark")
+    booking_date = timezone.make_aware(datetime(2020, 1, 1))
+    transactions = transactions_models.Transaction.objects.bulk_create([
+        transactions_models.Transaction(
+            account=bank_account,
+            booking_date=booking_date + timedelta(days=i // 3),
+            value_date=booking_date + timedelta(days=i // 3),
+            creditor=f"Empfänger {i % 100}",
+            amount=Decimal(rng.randint(-100000, 100000)) / 100,
+            currency="EUR",
+            transaction_type="Lastschrift",
+            purpose=f"Verwendungszweck {i}",
+        )
+        for i in range(num_rows)
+    ])
+
+    transactions_models.Transaction.records.through.objects.bulk_create([
+        transactions_models.Transaction.records.through(transaction_id=t.pk, record_id=r.pk)
+        for t, r in zip(transactions[::2], records)
+    ])
+
+
+class Command(BaseCommand):
+    help = "Compare serializers and the fast path (?fast=1) of the record and transaction lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Number of records and transactions to create")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        # The pagination links are absolute, "localhost" passes the host validation of the dev settings
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+        user = User(username="benchmark")
+
+        endpoints = (
+            ("records", RecordViewSet.as_view({"get": "list"}), "/v1/records/", {"pageSize": 1000}),
+            ("transactions", TransactionViewSet.as_view({"get": "list"}), "/v1/transactions/transactions/",
+             {"pagination": "cursor", "pageSize": 1000}),
+        )
+
+        def get(view, path, params):
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            response = view(request)
+            if hasattr(response, "render"):
+                response.render()
+            return response.content
+
+        with transaction.atomic():
+            seed(options["rows"])
+
+            for name, view, path, params in endpoints:
+                fast_params = dict(params, fast=1)
+                if get(view, path, params) != get(view, path, fast_params).replace(b"&fast=1", b""):
+                    raise AssertionError(f"Responses of the {name} list differ")
+
+                timings = {}
+                for mode, mode_params in (("serializer", params), ("fast", fast_params)):
+                    durations = []
+                    for _ in range(options["repeat"]):
+                        start = time.perf_counter()
+                        get(view, path, mode_params)
+                        durations.append(time.perf_counter() - start)
+                    timings[mode] = min(durations)
+
+                self.stdout.write(
+                    f"{name:>12}: serializer {timings['serializer'] * 1000:.1f}ms, "
+                    f"fast {timings['fast'] * 1000:.1f}ms ({timings['serializer'] / timings['fast']:.1f}x)"
+                )
+
+            transaction.set_rollback(True)
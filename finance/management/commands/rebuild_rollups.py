@@ -0,0 +1,12 @@
+from django.core.management import BaseCommand
+
+from finance.models import MonthlyRollup
+from finance.reports import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly rollups of all records"
+
+    def handle(self, *args, **options):
+        rebuild_rollups()
+        self.stdout.write(f"Rebuilt {MonthlyRollup.objects.count()} monthly rollups")
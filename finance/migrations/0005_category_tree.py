@@ -0,0 +1,62 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+CATEGORY_COLOR_FACTOR = 1.1
+CATEGORY_FALLBACK_COLOR = "#fafafa"
+
+
+def lighten_color(color):
+    rgb = [int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)]
+    rgb = [int(x * CATEGORY_COLOR_FACTOR) if x * CATEGORY_COLOR_FACTOR <= 255 else 255 for x in rgb]
+    return "#" + "".join("{0:02x}".format(x) for x in rgb)
+
+
+def build_category_tree(apps, schema_editor):
+    Category = apps.get_model('finance', 'Category')
+    categories = list(Category.objects.all())
+    children = {}
+    for category in categories:
+        children.setdefault(category.parent_id, []).append(category)
+
+    stack = [(category, None) for category in children.get(None, [])]
+    while stack:
+        category, parent = stack.pop()
+        if parent is None:
+            category.path = f"/{category.pk}/"
+            category.level = 0
+            category.resolved_color = category.color or CATEGORY_FALLBACK_COLOR
+        else:
+            category.path = f"{parent.path}{category.pk}/"
+            category.level = parent.level + 1
+            category.resolved_color = category.color or lighten_color(parent.resolved_color)
+
+        stack.extend((child, category) for child in children.get(category.pk, []))
+
+    Category.objects.bulk_update(categories, ['path', 'level', 'resolved_color'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_alter_record_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='level',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='resolved_color',
+            field=models.CharField(default='#fafafa', editable=False, max_length=25),
+        ),
+        migrations.RunPython(build_category_tree, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+
+
+def build_rollups(apps, schema_editor):
+    Record = apps.get_model('finance', 'Record')
+    MonthlyRollup = apps.get_model('finance', 'MonthlyRollup')
+
+    rows = (
+        Record.objects
+        .order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('account', 'category', 'month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+    MonthlyRollup.objects.bulk_create([
+        MonthlyRollup(
+            account_id=row['account'],
+            category_id=row['category'],
+            month=row['month'],
+            total=row['total'],
+            count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total', models.FloatField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='finance.account')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='finance.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='finance_mon_month_fe6708_idx')],
+                'unique_together': {('account', 'category', 'month')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
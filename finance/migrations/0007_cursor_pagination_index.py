@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['date', 'id'], name='finance_rec_date_d5eabc_idx'),
+        ),
+    ]
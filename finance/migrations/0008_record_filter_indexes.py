@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+def create_subject_trigram_index(apps, schema_editor):
+    # Postgres only, SQLite evaluates subject__icontains with a table scan
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS finance_record_subject_trgm_idx "
+        "ON finance_record USING gin (UPPER(subject::text) gin_trgm_ops)"
+    )
+
+
+def drop_subject_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS finance_record_subject_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_cursor_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['account', 'date'], name='finance_rec_account_ce47d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['category', 'date'], name='finance_rec_categor_e63624_idx'),
+        ),
+        migrations.RunPython(create_subject_trigram_index, drop_subject_trigram_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_record_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['amount', 'date'], name='finance_rec_amount_819c37_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_record_amount_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['contract', 'date'], name='finance_rec_contrac_cae816_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:10
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge rollups of records without category which were created twice by concurrent writes."""
+    MonthlyRollup = apps.get_model('finance', 'MonthlyRollup')
+
+    duplicates = (
+        MonthlyRollup.objects
+        .order_by()
+        .values('account', 'category', 'month')
+        .annotate(num=Count('id'), sum_total=Sum('total'), sum_count=Sum('count'))
+        .filter(num__gt=1)
+    )
+
+    for row in duplicates:
+        rollups = MonthlyRollup.objects.filter(account=row['account'], category=row['category'], month=row['month'])
+        first = rollups.order_by('id').first()
+        rollups.exclude(pk=first.pk).delete()
+        rollups.filter(pk=first.pk).update(total=row['sum_total'], count=row['sum_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_record_contract_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(fields=('account', 'category', 'month'), name='finance_monthlyrollup_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('account', 'month'), name='finance_monthlyrollup_unique_without_category'),
+        ),
+    ]
@@ -43,12 +43,24 @@ def get_payment_cycle_choices():
     return [(cycle["value"], cycle["name"]) for cycle in PAYMENT_CYCLES]
 
 
+def lighten_color(color: str) -> str:
+    rgb = [int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)]
+    rgb = [int(x * CATEGORY_COLOR_FACTOR) if x * CATEGORY_COLOR_FACTOR <= 255 else 255 for x in rgb]
+    return "#" + "".join("{0:02x}".format(x) for x in rgb)
+
+
 # TODO: Add user
 class Category(models.Model):
     name = models.CharField(verbose_name="Name", max_length=255, unique=True)
     color = ColorField(null=True)
     parent = models.ForeignKey('Category', models.PROTECT, null=True, blank=True)
 
+    # Materialized tree, maintained on save: IDs from the root to this category (e.g., "/1/5/"), depth and the color
+    # resolved along the parent chain
+    path = models.CharField(max_length=255, default="", editable=False, db_index=True)
+    level = models.PositiveIntegerField(default=0, editable=False)
+    resolved_color = models.CharField(max_length=25, default=CATEGORY_FALLBACK_COLOR, editable=False)
+
     class Meta:
         ordering = ['name']
         verbose_name = "Kategorie"
@@ -57,30 +69,70 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-    def get_color(self):
-        if self.color:
-            return self.color
-        elif self.parent:
-            parent_color = self.parent.get_color()
-            rgb = [int(parent_color[1:3], 16), int(parent_color[3:5], 16), int(parent_color[5:7], 16)]
-            rgb = [int(x * CATEGORY_COLOR_FACTOR) if x * CATEGORY_COLOR_FACTOR <= 255 else 255 for x in rgb]
-            color = "#" + "".join("{0:02x}".format(x) for x in rgb)
-            return color
+    def save(self, *args, **kwargs):
+        old = Category.objects.filter(pk=self.pk).values('path', 'level', 'resolved_color').first() \
+            if self.pk else None
+
+        # The tree fields are derived from the parent, which must not be a stale instance
+        if self.parent_id is not None:
+            self.parent = Category.objects.get(pk=self.parent_id)
+
+        if old and self.parent and self.parent.is_in_subtree(old['path']):
+            raise ValueError(f"Category {self} cannot be moved below itself.")
+
+        self.update_tree_fields()
+        super().save(*args, **kwargs)
+
+        # The path of new categories is only known after the first save
+        path = self.get_path()
+        if self.path != path:
+            self.path = path
+            Category.objects.filter(pk=self.pk).update(path=path)
+
+        if old and old != dict(path=self.path, level=self.level, resolved_color=self.resolved_color):
+            self.update_descendants(old['path'])
+
+    def update_tree_fields(self):
+        parent = self.parent
+
+        if parent is None:
+            self.level = 0
+            self.resolved_color = self.color or CATEGORY_FALLBACK_COLOR
         else:
-            return CATEGORY_FALLBACK_COLOR
+            self.level = parent.level + 1
+            self.resolved_color = self.color or lighten_color(parent.resolved_color)
+
+        if self.pk:
+            self.path = self.get_path()
+
+    def update_descendants(self, old_path: str):
+        descendants = list(Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).order_by('level'))
+
+        # Parents are updated before their children
+        nodes = {self.pk: self}
+        for category in descendants:
+            category.parent = nodes[category.parent_id]
+            category.update_tree_fields()
+            nodes[category.pk] = category
+
+        Category.objects.bulk_update(descendants, ['path', 'level', 'resolved_color'])
+
+    def get_path(self):
+        parent_path = self.parent.path if self.parent else "/"
+        return f"{parent_path}{self.pk}/"
+
+    def is_in_subtree(self, path: str) -> bool:
+        """Whether this is the category with ``path`` or one of its descendants."""
+        return self.path.startswith(path)
+
+    def get_color(self):
+        return self.resolved_color
 
     def get_level(self):
-        if self.parent is None:
-            return 0
-        else:
-            return 1 + self.parent.get_level()
+        return self.level
 
     def subtree(self):
-        children = list(Category.objects.filter(parent=self))
-        descendants = []
-        for c in children:
-            descendants.extend(c.subtree())
-        return [self] + descendants
+        return list(Category.objects.filter(path__startswith=self.path).order_by('path'))
 
 
 # TODO: Add user
@@ -116,6 +168,16 @@ class Record(models.Model):
 
     class Meta:
         ordering = ['-date', 'category']
+        indexes = [
+            models.Index(fields=['date', 'id']),
+            models.Index(fields=['account', 'date']),
+            models.Index(fields=['category', 'date']),
+            # Candidates of transaction suggestions (see transactions.matching)
+            models.Index(fields=['amount', 'date']),
+            # Payments of contracts (see finance.reports.reconcile_contracts)
+            models.Index(fields=['contract', 'date']),
+            # Postgres only: trigram index on UPPER(subject) for subject__icontains, see migration 0008
+        ]
         verbose_name = "Buchung"
         verbose_name_plural = "Buchungen"
 
@@ -126,6 +188,30 @@ class Record(models.Model):
         return self.date < other.date or (self.date == other.date and self.subject < other.subject)
 
 
+class MonthlyRollup(models.Model):
+    """Sum and number of records per account, category and month, maintained by signals (see finance.signals)."""
+    account = models.ForeignKey('Account', models.CASCADE)
+    category = models.ForeignKey('Category', models.CASCADE, null=True, blank=True)
+    month = models.DateField()
+
+    total = models.FloatField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'category', 'month'], name='finance_monthlyrollup_unique'),
+            # NULLs are distinct in the constraint above. Same as nulls_distinct=False, but also on SQLite/Postgres < 15
+            models.UniqueConstraint(
+                fields=['account', 'month'],
+                condition=models.Q(category__isnull=True),
+                name='finance_monthlyrollup_unique_without_category',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+
+
 # TODO: Add user
 class Contract(models.Model):
     name = models.CharField(max_length=255)
@@ -144,8 +230,8 @@ class Contract(models.Model):
     payment_cycle = models.CharField(verbose_name="Turnus", choices=get_payment_cycle_choices(), max_length=4)
     category = models.ForeignKey('Category', models.PROTECT, verbose_name="Kategorie")
 
-    def get_next_payment_date(self):
-        today = datetime.now()
+    def get_next_payment_date(self, as_of: date = None):
+        today = as_of or datetime.now().date()
         months = get_cycle_months(self.payment_cycle)
         match_month = (today.month - self.payment_date.month) % months == 0
         match_day = today.day >= self.payment_date.day
@@ -165,29 +251,39 @@ class Contract(models.Model):
         months = get_cycle_months(self.payment_cycle)
         return self.amount * (12 / months)
 
-    def is_cancelation_shortly(self):
-        next_cancelation = self.get_next_cancelation_date()
+    def is_cancelation_shortly(self, as_of: date = None, next_cancelation: date = None):
+        today = as_of or datetime.now().date()
+        next_cancelation = next_cancelation or self.get_next_cancelation_date(today)
 
         if next_cancelation is None:
             return False
 
-        return next_cancelation < datetime.now().date() + relativedelta(months=1)
+        return next_cancelation < today + relativedelta(months=1)
 
-    def get_next_extension_date(self):
+    def get_next_extension_date(self, as_of: date = None):
         if not self.minimum_duration or not self.renewal_duration:
             return None
 
-        # Compute first extension date
-        extension_date = self.date_start + relativedelta(months=self.minimum_duration)
+        today = as_of or datetime.now().date()
+
+        # Extensions are counted in months from the contract start, the first one after the minimum duration
+        months = (today.year - self.date_start.year) * 12 + today.month - self.date_start.month
+        extensions = max(0, -(-(months - self.minimum_duration) // self.renewal_duration))
+
+        extension_date = self.date_start + relativedelta(
+            months=self.minimum_duration + extensions * self.renewal_duration,
+        )
 
-        # Find extension date after now
-        while extension_date < datetime.now().date():
-            extension_date += relativedelta(months=self.renewal_duration)
+        # Same month as today, but an earlier day
+        if extension_date < today:
+            extension_date = self.date_start + relativedelta(
+                months=self.minimum_duration + (extensions + 1) * self.renewal_duration,
+            )
 
         return extension_date
 
-    def get_next_cancelation_date(self):
-        next_extension_date = self.get_next_extension_date()
+    def get_next_cancelation_date(self, as_of: date = None, next_extension_date: date = None):
+        next_extension_date = next_extension_date or self.get_next_extension_date(as_of)
 
         if next_extension_date is None:
             return None
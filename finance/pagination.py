@@ -0,0 +1,89 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'pageSize'
+    max_page_size = 1000
+
+
+class SortableCursorPagination(CursorPagination):
+    """
+    Keyset pagination ordered by ``ordering`` or, if given, the ``sortBy`` query parameters with the primary key as
+    tie-breaker.
+    """
+    page_size = 50
+    page_size_query_param = 'pageSize'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        order_by = request.query_params.getlist("sortBy")
+
+        if not order_by:
+            return self.ordering
+
+        # The cursor position is built from the value of the first field
+        position = order_by[0].lstrip("-")
+        if position not in queryset.query.annotations and self.get_field(queryset, position).null:
+            raise ValidationError(f"Cursor pagination cannot be sorted by '{position}' first, it may be empty.")
+
+        order_by = [self.get_cursor_field(queryset, name) for name in order_by]
+
+        tie_breaker = "-id" if order_by[0].startswith("-") else "id"
+        return (*order_by, tie_breaker)
+
+    def get_cursor_field(self, queryset, name: str) -> str:
+        """
+        Validate a ``sortBy`` value. Foreign keys are sorted by their column, since the cursor position is the string
+        value of the field on the last object of a page.
+        """
+        descending = name.startswith("-")
+        field_name = name.lstrip("-")
+
+        if field_name in queryset.query.annotations:
+            return name
+
+        return ("-" if descending else "") + self.get_field(queryset, field_name).attname
+
+    def get_field(self, queryset, field_name: str):
+        try:
+            field = queryset.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            raise ValidationError(f"Cursor pagination cannot be sorted by '{field_name}'.")
+
+        if not field.concrete or field.many_to_many:
+            raise ValidationError(f"Cursor pagination cannot be sorted by '{field_name}'.")
+
+        return field
+
+
+class RecordCursorPagination(SortableCursorPagination):
+    ordering = ('-date', '-id')
+
+
+class TransactionCursorPagination(SortableCursorPagination):
+    ordering = ('booking_date', 'id')
+
+
+class CursorPaginationMixin:
+    """
+    Use ``cursor_pagination_class`` instead of ``pagination_class`` if requested by ``?pagination=cursor``, or when
+    following a cursor link.
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+
+            if "cursor" in params or params.get("pagination") == "cursor":
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+
+        return self._paginator
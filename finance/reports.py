@@ -0,0 +1,199 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Sum, Count, QuerySet
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
+
+from finance.models import Category, Record, MonthlyRollup
+from finance.schedule import iter_payment_dates
+
+PERIODS = {
+    "month": TruncMonth,
+    "quarter": TruncQuarter,
+    "year": TruncYear,
+}
+
+SUMMARY_GROUPS = ("account", "category")
+
+# Maximum distance in days between an expected contract payment and its record
+RECONCILIATION_WINDOW_DAYS = 7
+
+RECONCILIATION_OK = "ok"
+RECONCILIATION_MISSING = "missing"
+RECONCILIATION_DUPLICATE = "duplicate"
+RECONCILIATION_AMOUNT = "amount"
+RECONCILIATION_UNEXPECTED = "unexpected"
+
+
+def get_ancestor_at_level(path: str, level: int) -> int:
+    if level < 0:
+        raise ValueError("Level must not be negative.")
+
+    ids = [int(pk) for pk in path.strip("/").split("/")]
+    return ids[min(level, len(ids) - 1)]
+
+
+def rollup_categories(rows: list[dict], level: int) -> list[dict]:
+    """
+    Merge summary rows of categories below ``level`` into their ancestor at ``level`` (0 being the root categories).
+    """
+    ancestors = {
+        pk: get_ancestor_at_level(path, level)
+        for pk, path in Category.objects.values_list('id', 'path')
+    }
+
+    merged = {}
+    for row in rows:
+        category = ancestors.get(row["category"], row["category"])
+        key = tuple(category if k == "category" else v for k, v in row.items() if k not in ("total", "count"))
+
+        if key in merged:
+            merged[key]["total"] += row["total"]
+            merged[key]["count"] += row["count"]
+        else:
+            merged[key] = dict(row, category=category)
+
+    return list(merged.values())
+
+
+def summarize(qs: QuerySet, date_field: str, total, count, period: str, group_by, level: int) -> list[dict]:
+    if period not in PERIODS:
+        raise ValueError(f"Period '{period}' does not exist.")
+
+    if any(field not in SUMMARY_GROUPS for field in group_by):
+        raise ValueError(f"Records can only be grouped by {', '.join(SUMMARY_GROUPS)}.")
+
+    if level is not None and level < 0:
+        raise ValueError("Level must not be negative.")
+
+    fields = ["period", *group_by]
+    rows = list(
+        qs
+        .order_by()
+        .annotate(period=PERIODS[period](date_field))
+        .values(*fields)
+        .annotate(period_total=total, period_count=count)
+        .order_by(*fields)
+    )
+
+    # The annotations must not clash with the fields of the rollups
+    rows = [
+        dict({field: row[field] for field in fields}, total=row["period_total"], count=row["period_count"])
+        for row in rows
+    ]
+
+    if level is not None and "category" in group_by:
+        rows = rollup_categories(rows, level)
+        rows.sort(key=lambda row: [(row[field] is not None, row[field]) for field in fields])
+
+    # Sums of floats, round to cents
+    for row in rows:
+        row["total"] = round(row["total"], 2)
+
+    return rows
+
+
+def summarize_records(records: QuerySet, period: str = "month", group_by=(), level: int = None) -> list[dict]:
+    """
+    Sum up the amounts of ``records`` per period and the fields in ``group_by`` (see ``SUMMARY_GROUPS``).
+
+    With ``level``, categories are rolled up to their ancestor at this level.
+    """
+    return summarize(records, 'date', Sum('amount'), Count('id'), period, group_by, level)
+
+
+def summarize_rollups(rollups: QuerySet, period: str = "month", group_by=(), level: int = None) -> list[dict]:
+    """Same as ``summarize_records``, but reads the precomputed monthly rollups."""
+    rollups = rollups.exclude(count=0)
+    return summarize(rollups, 'month', Sum('total'), Sum('count'), period, group_by, level)
+
+
+def rebuild_rollups():
+    rows = (
+        Record.objects
+        .order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('account', 'category', 'month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+    with transaction.atomic():
+        MonthlyRollup.objects.all().delete()
+        MonthlyRollup.objects.bulk_create([
+            MonthlyRollup(
+                account_id=row['account'],
+                category_id=row['category'],
+                month=row['month'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+def get_nearest(dates: list[date], day: date):
+    """Index of the date in the sorted list ``dates`` closest to ``day``."""
+    i = bisect_left(dates, day)
+    if i == len(dates) or (i > 0 and day - dates[i - 1] <= dates[i] - day):
+        i -= 1
+    return i
+
+
+def reconcile_contracts(contracts, date_from: date, date_to: date, window: int = RECONCILIATION_WINDOW_DAYS):
+    """
+    Compare the expected payments of ``contracts`` between the two dates with the records of the contracts.
+
+    Each record is assigned to the closest expected payment within ``window`` days. Returns a row per expected payment
+    with the status ``ok``, ``missing``, ``duplicate`` (several records) or ``amount`` (the amount deviates from the
+    contract) and a row with status ``unexpected`` per record in the date range without an expected payment. All
+    records are read with one query.
+    """
+    contracts = {contract.pk: contract for contract in contracts}
+    margin = timedelta(days=window)
+
+    records = defaultdict(list)
+    for record in (
+        Record.objects
+        .filter(contract__in=contracts, date__range=(date_from - margin, date_to + margin))
+        .order_by('contract', 'date', 'id')
+        .only('id', 'contract_id', 'date', 'amount')
+    ):
+        records[record.contract_id].append(record)
+
+    rows = []
+    for pk, contract in contracts.items():
+        expected = list(iter_payment_dates(contract, date_from, date_to))
+        matches = [[] for _ in expected]
+
+        for record in records[pk]:
+            i = get_nearest(expected, record.date) if expected else None
+
+            if i is not None and abs(record.date - expected[i]) <= margin:
+                matches[i].append(record)
+            elif date_from <= record.date <= date_to:
+                rows.append(dict(
+                    contract=pk, date=record.date, status=RECONCILIATION_UNEXPECTED,
+                    expected_amount=None, amount=record.amount, records=[record.pk],
+                ))
+
+        for payment_date, matched in zip(expected, matches):
+            if not matched:
+                status = RECONCILIATION_MISSING
+            elif len(matched) > 1:
+                status = RECONCILIATION_DUPLICATE
+            elif round(matched[0].amount - contract.amount, 2) != 0:
+                status = RECONCILIATION_AMOUNT
+            else:
+                status = RECONCILIATION_OK
+
+            rows.append(dict(
+                contract=pk, date=payment_date, status=status,
+                expected_amount=contract.amount,
+                amount=round(sum(r.amount for r in matched), 2) if matched else None,
+                records=[r.pk for r in matched],
+            ))
+
+    rows.sort(key=lambda row: (row["contract"], row["date"]))
+    return rows
@@ -0,0 +1,91 @@
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from finance.models import Contract, get_cycle_months
+
+MAX_FORECAST_YEARS = 50
+
+
+@dataclass
+class ContractSchedule:
+    next_payment_date: date | None
+    amount_per_year: float
+    next_extension_date: date | None
+    next_cancelation_date: date | None
+    is_cancelation_shortly: bool
+
+
+def get_schedule(contract: Contract, as_of: date) -> ContractSchedule:
+    """Dates of ``contract`` as of a given date. The next extension date is computed once and reused."""
+    next_extension_date = contract.get_next_extension_date(as_of)
+    next_cancelation_date = contract.get_next_cancelation_date(as_of, next_extension_date)
+
+    return ContractSchedule(
+        next_payment_date=contract.get_next_payment_date(as_of) if contract.payment_date else None,
+        amount_per_year=contract.get_amount_yearly(),
+        next_extension_date=next_extension_date,
+        next_cancelation_date=next_cancelation_date,
+        is_cancelation_shortly=contract.is_cancelation_shortly(as_of, next_cancelation_date),
+    )
+
+
+def get_schedules(contracts, as_of: date = None) -> dict[int, ContractSchedule]:
+    """Schedules of all ``contracts`` by their primary key, against the same date (default: today)."""
+    as_of = as_of or datetime.now().date()
+    return {contract.pk: get_schedule(contract, as_of) for contract in contracts}
+
+
+def get_month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def get_payment_day(month_index: int, day: int) -> date:
+    """Payment date in a month, clamped to the end of the month like ``Contract.get_next_payment_date``."""
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(day, calendar.monthrange(year, month + 1)[1]))
+
+
+def iter_payment_dates(contract: Contract, date_from: date, date_to: date):
+    """Lazily generate the payment dates of ``contract`` between ``date_from`` and ``date_to`` (inclusive)."""
+    if contract.payment_date is None:
+        return
+
+    months = get_cycle_months(contract.payment_cycle)
+    date_from = max(date_from, contract.date_start)
+
+    # First month of the payment cycle not before date_from
+    first = get_month_index(date_from)
+    first += (get_month_index(contract.payment_date) - first) % months
+
+    for month_index in range(first, get_month_index(date_to) + 1, months):
+        payment_date = get_payment_day(month_index, contract.payment_date.day)
+
+        if payment_date < date_from:
+            continue
+        if payment_date > date_to:
+            return
+
+        yield payment_date
+
+
+def forecast(contracts, date_from: date, date_to: date) -> list[dict]:
+    """Expected payments of ``contracts`` between the two dates, summed up per month, category and account."""
+    rows = {}
+
+    for contract in contracts:
+        for payment_date in iter_payment_dates(contract, date_from, date_to):
+            key = (payment_date.replace(day=1), contract.category_id, contract.account_id)
+            row = rows.get(key)
+
+            if row is None:
+                rows[key] = dict(month=key[0], category=key[1], account=key[2], total=contract.amount, count=1)
+            else:
+                row["total"] += contract.amount
+                row["count"] += 1
+
+    # Sums of floats, round to cents
+    for row in rows.values():
+        row["total"] = round(row["total"], 2)
+
+    return [rows[key] for key in sorted(rows)]
@@ -1,9 +1,40 @@
+from django.db.models import Prefetch, QuerySet
 from rest_framework import serializers
 
 from finance.models import Record, Contract, Category, Account
+from finance.schedule import ContractSchedule, get_schedules
 from transactions.models import Transaction
 
 
+def prefetch_for_serializer(queryset: QuerySet, serializer_class) -> QuerySet:
+    """
+    Add select_related/prefetch_related to ``queryset`` for the relations rendered by ``serializer_class``, so that
+    serializing a list of objects takes a constant number of queries.
+    """
+    model = queryset.model
+
+    for field in serializer_class().fields.values():
+        if field.source == '*' or '.' in field.source:
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            # Nested serializer with many=True
+            related_model = model._meta.get_field(field.source).related_model
+            related_queryset = prefetch_for_serializer(related_model.objects.all(), type(field.child))
+            queryset = queryset.prefetch_related(Prefetch(field.source, queryset=related_queryset))
+        elif isinstance(field, serializers.ManyRelatedField):
+            # Only primary keys are rendered
+            related_model = model._meta.get_field(field.source).related_model
+            queryset = queryset.prefetch_related(Prefetch(field.source, queryset=related_model.objects.only('pk')))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Rendered from the foreign key column
+            continue
+        elif isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+            queryset = queryset.select_related(field.source)
+
+    return queryset
+
+
 class AccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Account
@@ -27,13 +58,38 @@ class RecordSerializer(serializers.ModelSerializer):
 # TODO: Fix typo in 'cancelation'
 class ContractSerializer(serializers.ModelSerializer):
     # Payment information
-    next_payment_date = serializers.DateField(source='get_next_payment_date', read_only=True)
-    amount_per_year = serializers.FloatField(source='get_amount_yearly', read_only=True)
+    next_payment_date = serializers.SerializerMethodField()
+    amount_per_year = serializers.SerializerMethodField()
 
     # Contract information
-    is_cancelation_shortly = serializers.BooleanField(read_only=True)
-    next_extension_date = serializers.DateField(source='get_next_extension_date', read_only=True)
-    next_cancelation_date = serializers.DateField(source='get_next_cancelation_date', read_only=True)
+    is_cancelation_shortly = serializers.SerializerMethodField()
+    next_extension_date = serializers.SerializerMethodField()
+    next_cancelation_date = serializers.SerializerMethodField()
+
+    def get_schedule(self, contract: Contract) -> ContractSchedule:
+        """
+        Schedule from the context (``schedules`` by primary key, computed in one pass for lists), otherwise computed
+        as of ``as_of`` in the context or today.
+        """
+        schedules = self.context.setdefault('schedules', {})
+        if contract.pk not in schedules:
+            schedules.update(get_schedules([contract], self.context.get('as_of')))
+        return schedules[contract.pk]
+
+    def get_next_payment_date(self, contract: Contract):
+        return self.get_schedule(contract).next_payment_date
+
+    def get_amount_per_year(self, contract: Contract):
+        return self.get_schedule(contract).amount_per_year
+
+    def get_is_cancelation_shortly(self, contract: Contract):
+        return self.get_schedule(contract).is_cancelation_shortly
+
+    def get_next_extension_date(self, contract: Contract):
+        return self.get_schedule(contract).next_extension_date
+
+    def get_next_cancelation_date(self, contract: Contract):
+        return self.get_schedule(contract).next_cancelation_date
 
     class Meta:
         model = Contract
@@ -49,4 +105,11 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        fields = '__all__'
+        exclude = ('path', 'resolved_color')
+
+    def validate_parent(self, parent):
+        # Same check as Category.save
+        if self.instance is not None and parent is not None and parent.is_in_subtree(self.instance.path):
+            raise serializers.ValidationError("A category cannot be moved below itself.")
+
+        return parent
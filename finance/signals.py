@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from backend.signals import remember_stored_state, get_state
+from finance.autocomplete import subject_index
+from finance.models import Record, MonthlyRollup
+
+
+# Fields of a record which determine its contribution to the monthly rollups
+ROLLUP_FIELDS = ('account_id', 'category_id', 'date', 'amount')
+
+
+def get_rollup_key(account_id, category_id, date):
+    return dict(account_id=account_id, category_id=category_id, month=date.replace(day=1))
+
+
+def apply_rollup_delta(key: dict, total: float, count: int):
+    # The row lock serializes concurrent deltas, the unique constraint concurrent creates (see get_or_create)
+    with transaction.atomic():
+        rollup, _ = MonthlyRollup.objects.select_for_update().get_or_create(**key)
+        MonthlyRollup.objects.filter(pk=rollup.pk).update(total=F('total') + total, count=F('count') + count)
+
+
+@receiver(pre_save, sender=Record)
+def remember_record_state(sender, instance: Record, **kwargs):
+    # The stored state is needed to revert the previous contribution to the rollups and the subject index
+    remember_stored_state(instance, (*ROLLUP_FIELDS, 'subject'))
+
+
+def get_subject_state(instance: Record) -> Record:
+    # Copy of the values of the index, the instance may change until the transaction commits
+    return Record(subject=instance.subject, category_id=instance.category_id, contract_id=instance.contract_id)
+
+
+# The index is shared by all requests, so it is only updated once the transaction commits. Otherwise a rolled back
+# write would stay in the index until it is rebuilt.
+
+@receiver(post_save, sender=Record)
+def update_subject_index_on_save(sender, instance: Record, **kwargs):
+    old = getattr(instance, '_stored_state', None)
+    record = get_subject_state(instance)
+
+    if old is not None:
+        old_subject = old['subject']
+        transaction.on_commit(lambda: subject_index.update(old_subject, record))
+    else:
+        transaction.on_commit(lambda: subject_index.add(record))
+
+
+@receiver(post_delete, sender=Record)
+def update_subject_index_on_delete(sender, instance: Record, **kwargs):
+    subject = instance.subject
+    transaction.on_commit(lambda: subject_index.remove(subject))
+
+
+@receiver(post_save, sender=Record)
+def update_rollup_on_save(sender, instance: Record, **kwargs):
+    old = getattr(instance, '_stored_state', None)
+    new = get_state(instance, ROLLUP_FIELDS)
+    new_key = get_rollup_key(new['account_id'], new['category_id'], new['date'])
+
+    if old is not None:
+        old_key = get_rollup_key(old['account_id'], old['category_id'], old['date'])
+
+        if old_key == new_key:
+            if old['amount'] != new['amount']:
+                apply_rollup_delta(new_key, new['amount'] - old['amount'], 0)
+            return
+
+        apply_rollup_delta(old_key, -old['amount'], -1)
+
+    apply_rollup_delta(new_key, new['amount'], 1)
+
+
+@receiver(post_delete, sender=Record)
+def update_rollup_on_delete(sender, instance: Record, **kwargs):
+    state = get_state(instance, ROLLUP_FIELDS)
+    apply_rollup_delta(get_rollup_key(state['account_id'], state['category_id'], state['date']), -state['amount'], -1)
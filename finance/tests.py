@@ -0,0 +1,59 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from finance.models import Account, Category, Record
+from transactions import models as transactions_models
+
+
+class RecordListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create(name="Giro", type="Girokonto")
+        category = Category.objects.create(name="Wohnen")
+        records = Record.objects.bulk_create([
+            Record(
+                account=account,
+                category=category,
+                subject=f"Buchung {i}",
+                date=date(2024, 1, 1) + timedelta(days=i),
+                amount=i,
+            )
+            for i in range(60)
+        ])
+
+        bank_account = transactions_models.Account.objects.create(iban="DE00TEST", name="Giro")
+        for record in records[::2]:
+            t = transactions_models.Transaction.objects.create(
+                account=bank_account, booking_date="2024-01-01T00:00:00Z", value_date="2024-01-01T00:00:00Z",
+                creditor="Vermieter", amount=record.amount, currency="EUR", transaction_type="Lastschrift",
+                purpose=record.subject,
+            )
+            t.records.add(record)
+
+        cls.user = User.objects.create(username="test")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        # Savepoint of the atomic request, count, records, primary keys of their transactions and release
+        for page_size in (5, 50):
+            with self.subTest(page_size=page_size), self.assertNumQueries(5):
+                response = self.client.get("/v1/records/", {"pageSize": page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_fast_cursor_pages_match_serializer(self):
+        # The cursor position is read from ordering fields which are not part of the encoded rows
+        for sort_by in ("account", "-transaction_count", "subject"):
+            params = {"pagination": "cursor", "pageSize": 20, "sortBy": sort_by}
+            with self.subTest(sort_by=sort_by):
+                response = self.client.get("/v1/records/", params)
+                fast_response = self.client.get("/v1/records/", dict(params, fast=1))
+                self.assertEqual(fast_response.status_code, 200)
+                self.assertEqual(json.loads(fast_response.content)["results"], response.json()["results"])
@@ -1,19 +1,37 @@
-from django.db.models import Count
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, Subquery, OuterRef
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from finance.models import Record, Contract, Category, Account
-from finance.serializers import RecordSerializer, ContractSerializer, CategorySerializer, AccountSerializer
+from finance.autocomplete import subject_index, MAX_SUGGESTIONS
+from finance.encoders import FastListMixin, ExportMixin, RECORD_FIELDS, encode_records
+from finance.models import Record, Contract, Category, Account, MonthlyRollup
+from finance.pagination import StandardResultsSetPagination, RecordCursorPagination, CursorPaginationMixin
+from finance.reports import summarize_records, summarize_rollups, reconcile_contracts
+from finance.schedule import get_schedules, forecast, MAX_FORECAST_YEARS
+from finance.serializers import RecordSerializer, ContractSerializer, CategorySerializer, AccountSerializer, \
+    prefetch_for_serializer
 from transactions.models import Transaction
 from transactions.serializers import TransactionSerializer
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 50
-    page_size_query_param = 'pageSize'
-    max_page_size = 1000
+# Number of transactions linked to a record, only annotated when filtering or sorting by it
+TRANSACTION_COUNT = Coalesce(
+    Subquery(
+        Transaction.records.through.objects
+        .filter(record=OuterRef('pk'))
+        .order_by()
+        .values('record')
+        .annotate(count=Count('*'))
+        .values('count')
+    ),
+    0,
+)
 
 
 class AccountViewSet(viewsets.ReadOnlyModelViewSet):
@@ -23,12 +41,14 @@ class AccountViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class RecordViewSet(viewsets.ModelViewSet):
+class RecordViewSet(ExportMixin, FastListMixin, CursorPaginationMixin, viewsets.ModelViewSet):
     model = Record
     serializer_class = RecordSerializer
     queryset = Record.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = StandardResultsSetPagination
+    cursor_pagination_class = RecordCursorPagination
+    fast_fields = RECORD_FIELDS
 
     ALLOWED_LOOKUPS = (
         "id",
@@ -56,10 +76,16 @@ class RecordViewSet(viewsets.ModelViewSet):
         "transaction_count__lt",
     )
 
+    SUMMARY_PARAMS = (
+        "period",
+        "groupBy",
+        "level",
+    )
+
     @action(detail=True)
     def transactions(self, request, pk=None):
         record = self.get_object()
-        transactions = record.transactions.all()
+        transactions = prefetch_for_serializer(Transaction.objects.filter(records=record), TransactionSerializer)
         serializer = TransactionSerializer(transactions, many=True)
         return Response(serializer.data)
 
@@ -93,28 +119,123 @@ class RecordViewSet(viewsets.ModelViewSet):
 
     @action(detail=False)
     def subjects(self, request):
+        """
+        Most used subjects starting with ``query`` as ``[subject, category, contract]``, with the category and contract
+        of the last record with this subject. At most ``limit`` subjects are returned.
+        """
         query = request.query_params.get("query", "")
-        qs = Record.objects.all()
-        if query != "":
-            qs = qs.filter(subject__startswith=query)
-        qs = qs.values_list("subject", "category", "contract").distinct().order_by()
-        response = Response(data=qs)
-        return response
+        limit = request.query_params.get("limit", "")
+
+        try:
+            limit = int(limit) if limit else MAX_SUGGESTIONS
+        except ValueError:
+            raise ValidationError("Limit must be a number.")
+
+        entries = subject_index.search(query, limit)
+        return Response(data=[[entry.subject, entry.category, entry.contract] for entry in entries])
+
+    @action(detail=False)
+    def summary(self, request):
+        """
+        Sum up the amounts of all records matching the filters of the list view. Query parameters:
+        - period: month (default), quarter or year
+        - groupBy: account and/or category
+        - level: roll categories up to their ancestor at this level (0 = root categories)
+        """
+        level = request.query_params.get("level")
+
+        try:
+            try:
+                level = int(level) if level else None
+            except ValueError:
+                raise ValueError("Level must be a number.")
+
+            options = dict(
+                period=request.query_params.get("period", "month"),
+                group_by=request.query_params.getlist("groupBy"),
+                level=level,
+            )
+
+            rollups = self.filter_rollups()
+            if rollups is not None:
+                rows = summarize_rollups(rollups, **options)
+            else:
+                records = self.filter_records(Record.objects.all())
+                rows = summarize_records(records, **options)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        return Response(data=rows)
+
+    def encode_rows(self, rows):
+        return encode_records(rows)
 
     def get_queryset(self):
         qs = super().get_queryset()
 
         # Sorting
         order_by = self.request.query_params.getlist("sortBy")
+        if self.uses_transaction_count():
+            qs = qs.annotate(transaction_count=TRANSACTION_COUNT)
         qs = qs.order_by(*order_by)
 
+        qs = prefetch_for_serializer(qs, self.get_serializer_class())
+        return self.filter_records(qs)
+
+    def filter_rollups(self):
+        """
+        Apply the filters of the summary to the monthly rollups. Returns None if the filters cannot be answered from
+        the rollups, i.e., other filters than account, category and date ranges on month boundaries are used.
+        """
+        rollups = MonthlyRollup.objects.all()
+
+        for lookup, value in self.request.query_params.items():
+            if lookup in self.SUMMARY_PARAMS or not value:
+                continue
+
+            if lookup in ("account", "category"):
+                rollups = rollups.filter(**{lookup: value})
+            elif lookup == "category__subtree":
+                path = Category.objects.filter(pk=value).order_by().values('path')
+                rollups = rollups.filter(category__path__startswith=Subquery(path))
+            elif lookup in ("date__gte", "date__lt"):
+                try:
+                    month = date.fromisoformat(value)
+                except ValueError:
+                    return None
+
+                if month.day != 1:
+                    return None
+
+                rollups = rollups.filter(**{lookup.replace("date", "month"): month})
+            else:
+                return None
+
+        return rollups
+
+    def uses_transaction_count(self):
+        params = self.request.query_params
+        return (
+            any(params.get(lookup) for lookup in self.ALLOWED_LOOKUPS if lookup.startswith("transaction_count"))
+            or any(field.lstrip("-") == "transaction_count" for field in params.getlist("sortBy"))
+        )
+
+    def filter_records(self, qs):
         # Filtering
-        qs = qs.annotate(transaction_count=Count('transactions'))
+        if self.uses_transaction_count() and "transaction_count" not in qs.query.annotations:
+            qs = qs.annotate(transaction_count=TRANSACTION_COUNT)
+
         for lookup in self.ALLOWED_LOOKUPS:
             value = self.request.query_params.get(lookup)
             if value:
                 qs = qs.filter(**{lookup: value})
 
+        # Category including its descendants
+        category = self.request.query_params.get("category__subtree")
+        if category:
+            path = Category.objects.filter(pk=category).order_by().values('path')
+            qs = qs.filter(category__path__startswith=Subquery(path))
+
         # Quick filter
         query = self.request.query_params.get("q", "")
         if query:
@@ -129,6 +250,76 @@ class ContractViewSet(viewsets.ModelViewSet):
     queryset = Contract.objects.all()
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_as_of(self) -> date:
+        """Reference date of the computed contract dates (``?asOf=YYYY-MM-DD``, default: today)."""
+        return self.get_date_param("asOf", datetime.now().date())
+
+    def get_date_param(self, name: str, default: date = None) -> date:
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError(f"Date '{name}' must be in the format YYYY-MM-DD.")
+
+    @action(detail=False)
+    def forecast(self, request):
+        """
+        Expected payments of the active contracts from ``from`` (default: today) to ``to`` (default: one year later),
+        summed up per month, category and account.
+        """
+        date_from = self.get_date_param("from", datetime.now().date())
+        date_to = self.get_date_param("to", date_from + relativedelta(years=1))
+
+        if date_to < date_from:
+            raise ValidationError("Date 'to' must not be before 'from'.")
+
+        if date_to > date_from + relativedelta(years=MAX_FORECAST_YEARS):
+            raise ValidationError(f"Forecasts are limited to {MAX_FORECAST_YEARS} years.")
+
+        contracts = Contract.objects.filter(is_active=True).order_by()
+        return Response(data=forecast(contracts, date_from, date_to))
+
+    @action(detail=False)
+    def reconciliation(self, request):
+        """
+        Expected payments of the active contracts from ``from`` (default: one year ago) to ``to`` (default: today),
+        compared with their records. See ``reconcile_contracts`` for the statuses, ``?status=`` filters by status.
+        """
+        date_to = self.get_date_param("to", datetime.now().date())
+        date_from = self.get_date_param("from", date_to - relativedelta(years=1))
+
+        if date_to < date_from:
+            raise ValidationError("Date 'to' must not be before 'from'.")
+
+        if date_to > date_from + relativedelta(years=MAX_FORECAST_YEARS):
+            raise ValidationError(f"Reports are limited to {MAX_FORECAST_YEARS} years.")
+
+        rows = reconcile_contracts(Contract.objects.filter(is_active=True).order_by(), date_from, date_to)
+
+        statuses = request.query_params.getlist("status")
+        if statuses:
+            rows = [row for row in rows if row["status"] in statuses]
+
+        return Response(data=rows)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["as_of"] = self.get_as_of()
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        # Compute the schedules of all contracts of a list in one pass
+        if args and kwargs.get("many"):
+            contracts = list(args[0])
+            context = kwargs.setdefault("context", self.get_serializer_context())
+            context["schedules"] = get_schedules(contracts, context["as_of"])
+            args = (contracts, *args[1:])
+
+        return super().get_serializer(*args, **kwargs)
+
 
 class CategoryViewSet(viewsets.ModelViewSet):
     model = Category
@@ -0,0 +1,138 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum, Window, F, QuerySet, DateField
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from transactions.models import Account, Transaction, BalanceSnapshot
+
+# Sums are floats on SQLite, round them to cents
+CENT = Decimal("0.01")
+
+
+def trunc_month(field: str) -> TruncMonth:
+    return TruncMonth(field, output_field=DateField())
+
+
+PERIODS = {
+    "day": TruncDate,
+    "month": trunc_month,
+}
+
+
+def to_datetime(day: date) -> datetime:
+    """Start of ``day`` in the current time zone, booking dates are stored as local midnight."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_transactions(account: Account, date_from: date = None, date_to: date = None) -> QuerySet:
+    """Transactions of ``account`` booked on or after ``date_from`` and before ``date_to``."""
+    transactions = Transaction.objects.filter(account=account).order_by()
+    if date_from is not None:
+        transactions = transactions.filter(booking_date__gte=to_datetime(date_from))
+    if date_to is not None:
+        transactions = transactions.filter(booking_date__lt=to_datetime(date_to))
+    return transactions
+
+
+def get_total(transactions: QuerySet) -> Decimal:
+    return (transactions.aggregate(total=Sum('amount'))['total'] or Decimal(0)).quantize(CENT)
+
+
+def update_snapshots(account: Account, until: date) -> BalanceSnapshot | None:
+    """
+    Create the missing monthly snapshots of ``account`` up to the month of ``until`` and return the latest one.
+
+    Only the transactions after the latest existing snapshot are read, summed up per month with a window function.
+    """
+    until = until.replace(day=1)
+    latest = BalanceSnapshot.objects.filter(account=account, date__lte=until).order_by('date').last()
+
+    if latest is not None and latest.date == until:
+        return latest
+
+    if latest is None:
+        first = get_transactions(account).order_by('booking_date').values_list('booking_date', flat=True).first()
+        if first is None:
+            return None
+
+        # Nothing is booked before the first month
+        latest = BalanceSnapshot(account=account, date=timezone.localtime(first).date().replace(day=1), total=0)
+        if latest.date > until:
+            return None
+        latest.save()
+
+    # Running total at the end of each month with transactions
+    months = dict(
+        get_transactions(account, latest.date, until)
+        .annotate(month=trunc_month('booking_date'))
+        .annotate(running=Window(Sum('amount'), order_by=F('month').asc()))
+        .values_list('month', 'running')
+        .distinct()
+    )
+
+    snapshots = []
+    total = latest.total
+    month = latest.date
+    while month < until:
+        if month in months:
+            total = latest.total + months[month].quantize(CENT)
+        month += relativedelta(months=1)
+        snapshots.append(BalanceSnapshot(account=account, date=month, total=total))
+
+    BalanceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return snapshots[-1] if snapshots else latest
+
+
+def invalidate_snapshots(account: Account | int, booking_date: datetime):
+    """Delete the snapshots which include transactions booked on or after ``booking_date``."""
+    if timezone.is_naive(booking_date):
+        booking_date = timezone.make_aware(booking_date)
+
+    BalanceSnapshot.objects.filter(account=account, date__gt=timezone.localtime(booking_date).date()).delete()
+
+
+def get_balances(account: Account, date_from: date, date_to: date, period: str = "day") -> list[dict]:
+    """
+    Balance of ``account`` at the end of each day (or month) with transactions between the two dates (inclusive).
+
+    The balance before ``date_from`` is read from the latest monthly snapshot and the transactions since, so only the
+    transactions of the requested range and at most one month before are scanned. Balances include the opening
+    balance of the account, if known.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Period '{period}' does not exist.")
+
+    if period == "month":
+        date_from = date_from.replace(day=1)
+
+    snapshot = update_snapshots(account, date_from)
+    if snapshot is not None:
+        start = snapshot.total + get_total(get_transactions(account, snapshot.date, date_from))
+    else:
+        start = get_total(get_transactions(account, date_to=date_from))
+
+    start += account.opening_balance or 0
+
+    rows = (
+        get_transactions(account, date_from, date_to + relativedelta(days=1))
+        .annotate(period=PERIODS[period]('booking_date'))
+        .annotate(running=Window(Sum('amount'), order_by=F('period').asc()))
+        .values_list('period', 'running')
+        .distinct()
+        .order_by('period')
+    )
+
+    return [dict(date=period_date, balance=start + running.quantize(CENT)) for period_date, running in rows]
+
+
+def update_opening_balance(account: Account, balance: Decimal, statement_end: datetime):
+    """
+    Derive the opening balance of ``account`` from the balance of a statement, which includes all transactions
+    booked until ``statement_end``.
+    """
+    total = get_total(Transaction.objects.filter(account=account, booking_date__lte=statement_end))
+    account.opening_balance = balance - total
+    account.save(update_fields=['opening_balance'])
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from finance.encoders import RECORD_FIELDS, encode_datetime, encode_records
+from transactions.models import Transaction
+
+# Fields of TransactionSerializer ('account' is rendered as IBAN, 'records' is added by encode_transactions)
+TRANSACTION_FIELDS = (
+    "id",
+    "account__iban",
+    "booking_date",
+    "value_date",
+    "creditor",
+    "amount",
+    "currency",
+    "transaction_type",
+    "purpose",
+    "date_created",
+    "is_ignored",
+    "is_highlighted",
+    "is_counter_to",
+)
+
+
+def get_records(transaction_ids) -> dict:
+    """Encoded records linked to each transaction, in the order of Record.Meta.ordering."""
+    links = list(
+        Transaction.records.through.objects
+        .filter(transaction_id__in=transaction_ids)
+        .order_by('-record__date', 'record__category', 'record_id')
+        .values('transaction_id', *(f"record__{field}" for field in RECORD_FIELDS))
+    )
+
+    records = encode_records([
+        {field: link[f"record__{field}"] for field in RECORD_FIELDS}
+        for link in links
+    ])
+
+    records_by_transaction = defaultdict(list)
+    for link, record in zip(links, records):
+        records_by_transaction[link["transaction_id"]].append(record)
+
+    return records_by_transaction
+
+
+def encode_transactions(rows: list[dict]) -> list[dict]:
+    """Encode rows of ``Transaction.objects.values(*TRANSACTION_FIELDS)`` like TransactionSerializer."""
+    records = get_records([row["id"] for row in rows])
+
+    return [
+        {
+            "id": row["id"],
+            "account": row["account__iban"],
+            "records": records.get(row["id"], []),
+            "booking_date": encode_datetime(row["booking_date"]),
+            "value_date": encode_datetime(row["value_date"]),
+            "creditor": row["creditor"],
+            "amount": float(row["amount"]),
+            "currency": row["currency"],
+            "transaction_type": row["transaction_type"],
+            "purpose": row["purpose"],
+            "date_created": encode_datetime(row["date_created"]),
+            "is_ignored": row["is_ignored"],
+            "is_highlighted": row["is_highlighted"],
+            "is_counter_to": row["is_counter_to"],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,296 @@
+import csv
+import io
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from operator import itemgetter, methodcaller
+from urllib.request import urlopen
+
+from django.utils import timezone
+
+from transactions.balances import invalidate_snapshots, update_opening_balance
+from transactions.models import Transaction, Account
+
+logger = logging.getLogger()
+
+IMPORT_BATCH_SIZE = 500
+
+# Fields identifying a transaction within an account (same fields as the former get_or_create lookup)
+NATURAL_KEY_FIELDS = (
+    "booking_date",
+    "value_date",
+    "amount",
+    "creditor",
+    "transaction_type",
+    "purpose",
+    "currency",
+)
+
+
+def get_natural_key(transaction_dict: dict) -> tuple:
+    return tuple(transaction_dict[field] for field in NATURAL_KEY_FIELDS)
+
+
+def parse_date(value: str) -> datetime:
+    return timezone.make_aware(datetime.strptime(value, "%d.%m.%Y"))
+
+
+def parse_amount(value: str) -> Decimal:
+    return Decimal(value.replace(".", "").replace(",", "."))
+
+
+# Same as parse_amount: drop thousands separators and use "." as decimal separator
+AMOUNT_TRANSLATION = str.maketrans({".": None, ",": "."})
+
+
+def parse_amounts(values) -> list[Decimal]:
+    return list(map(Decimal, map(methodcaller("translate", AMOUNT_TRANSLATION), values)))
+
+
+def parse_saldo(value: str) -> Decimal:
+    """Parse the balance in the header of a statement, e.g. "1.234,56 EUR"."""
+    return parse_amount(value.split()[0])
+
+
+def get_or_create_account(iban: str, name: str) -> Account:
+    if not iban:
+        raise ValueError("Statement does not contain an IBAN.")
+
+    try:
+        return Account.objects.get(iban=iban)
+    except Account.DoesNotExist:
+        return Account.objects.create(
+            iban=iban,
+            name=name,
+        )
+
+
+def import_transactions(account: Account, transactions: list[dict], batch_size: int = IMPORT_BATCH_SIZE):
+    """
+    Insert all transactions of ``account`` which do not exist yet.
+
+    Existing transactions are fetched with a single query over the booking date range of the given transactions and
+    compared by their natural key. Duplicates within ``transactions`` are only inserted once.
+
+    Returns a tuple ``(num_created, num_skipped)``.
+    """
+    if not transactions:
+        return 0, 0
+
+    booking_dates = [t["booking_date"] for t in transactions]
+    existing_keys = set(
+        Transaction.objects.filter(
+            account=account,
+            booking_date__range=(min(booking_dates), max(booking_dates)),
+        ).values_list(*NATURAL_KEY_FIELDS)
+    )
+
+    new_transactions = []
+    for transaction_dict in transactions:
+        key = get_natural_key(transaction_dict)
+        if key in existing_keys:
+            continue
+
+        existing_keys.add(key)
+        new_transactions.append(Transaction(account=account, **transaction_dict))
+
+    Transaction.objects.bulk_create(new_transactions, batch_size=batch_size)
+
+    if new_transactions:
+        invalidate_snapshots(account, min(t.booking_date for t in new_transactions))
+
+    num_created = len(new_transactions)
+    return num_created, len(transactions) - num_created
+
+
+def update_balance(account: Account, saldo: Decimal, transactions_end: datetime):
+    """Update the opening balance of ``account`` from the balance of a statement, if the statement contains one."""
+    if saldo is not None and transactions_end is not None:
+        update_opening_balance(account, saldo, transactions_end)
+
+
+def iter_batches(iterable, batch_size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+class StatementReader:
+    """
+    Reads the transactions of a CSV bank statement, either row by row or in column-wise parsed batches.
+
+    Header fields (IBAN, account name, balance) are collected while reading and are available once the first
+    transaction has been yielded. ``transactions_end`` is the latest booking date read so far. With ``skip_errors``,
+    malformed rows are counted in ``num_errors`` and skipped instead of raising.
+    """
+
+    def __init__(self, reader: csv.reader, skip_errors: bool = False):
+        self.reader = reader
+        self.skip_errors = skip_errors
+        self.iban = None
+        self.name = None
+        self.contains_saldo = False
+        self.saldo = None
+        self.transactions_end = None
+        self.num_errors = 0
+
+        # Parsed dates by their string value, dates repeat for many rows of a statement
+        self.date_cache = {}
+
+    def __iter__(self):
+        for row in self.iter_payload():
+            transaction_dict = self.try_parse_row(row)
+
+            if transaction_dict is not None:
+                self.track([transaction_dict])
+                yield transaction_dict
+
+    def iter_batches(self, batch_size: int):
+        """
+        Parse the transactions column-wise in batches of ``batch_size``.
+
+        Yields the same transactions as iterating the reader row by row, but converts dates and amounts of a whole
+        batch at once.
+        """
+        for rows in iter_batches(self.iter_payload(), batch_size):
+            try:
+                transactions = self.parse_columns(rows)
+            except (ValueError, ArithmeticError, IndexError):
+                if not self.skip_errors:
+                    raise
+
+                # Parse the batch row by row to skip only the malformed rows
+                transactions = [self.try_parse_row(row) for row in rows]
+                transactions = [t for t in transactions if t is not None]
+
+            self.track(transactions)
+            yield transactions
+
+    def track(self, transactions: list[dict]):
+        if transactions:
+            end = max(t["booking_date"] for t in transactions)
+            if self.transactions_end is None or end > self.transactions_end:
+                self.transactions_end = end
+
+    def iter_payload(self):
+        reading_payload = False
+
+        for row in self.reader:
+            if not row:
+                continue
+
+            if row[0] == "IBAN":
+                self.iban = row[1].replace(" ", "").strip()
+
+            if row[0] == "Kontoname":
+                self.name = row[1]
+
+            if row[0] == "Saldo":
+                self.contains_saldo = True
+                logger.debug("File contains 'Saldo'")
+
+                try:
+                    self.saldo = parse_saldo(row[1])
+                except (ValueError, ArithmeticError, IndexError):
+                    logger.warning(f"Skip malformed balance: {row}")
+
+            if row[0] == "Buchung":
+                reading_payload = True
+                continue
+
+            if reading_payload:
+                yield row
+
+    def try_parse_row(self, row: list[str]):
+        try:
+            return self.parse_row(row)
+        except (ValueError, ArithmeticError, IndexError):
+            if not self.skip_errors:
+                raise
+
+            self.num_errors += 1
+            logger.warning(f"Skip malformed row: {row}")
+            return None
+
+    def parse_row(self, row: list[str]) -> dict:
+        amount_str = row[7] if self.contains_saldo else row[5]
+        currency = row[8] if self.contains_saldo else row[6]
+
+        return dict(
+            booking_date=parse_date(row[0]),
+            value_date=parse_date(row[1]),
+            creditor=row[2],
+            transaction_type=row[3],
+            purpose=row[4],
+            amount=parse_amount(amount_str),
+            currency=currency,
+        )
+
+    def parse_columns(self, rows: list[list[str]]) -> list[dict]:
+        amount_index = 7 if self.contains_saldo else 5
+
+        # Fails with an IndexError on short rows, like parse_row
+        currencies = list(map(itemgetter(amount_index + 1), rows))
+        amounts = parse_amounts(map(itemgetter(amount_index), rows))
+
+        return [
+            dict(
+                booking_date=booking_date,
+                value_date=value_date,
+                creditor=creditor,
+                transaction_type=transaction_type,
+                purpose=purpose,
+                amount=amount,
+                currency=currency,
+            )
+            for booking_date, value_date, creditor, transaction_type, purpose, amount, currency in zip(
+                self.parse_dates(map(itemgetter(0), rows)),
+                self.parse_dates(map(itemgetter(1), rows)),
+                map(itemgetter(2), rows),
+                map(itemgetter(3), rows),
+                map(itemgetter(4), rows),
+                amounts,
+                currencies,
+            )
+        ]
+
+    def parse_dates(self, values) -> list[datetime]:
+        values = list(values)
+        cache = self.date_cache
+
+        for value in set(values).difference(cache):
+            cache[value] = parse_date(value)
+
+        return list(map(cache.__getitem__, values))
+
+
+@contextmanager
+def open_csv(data_uri: str):
+    """Open a (data) URI and return a CSV reader which decodes the file incrementally."""
+    with urlopen(data_uri) as response:
+        f = io.TextIOWrapper(response, encoding="iso-8859-1", newline="")
+        yield csv.reader(f, delimiter=";")
+
+
+def parse_file(data_uri: str):
+    """
+    Parse a whole CSV file into memory.
+
+    Used by the worker processes of parallel imports, hence the result only contains picklable values:
+    ``(iban, name, transactions, num_errors, saldo)``.
+    """
+    with open_csv(data_uri) as reader:
+        statement = StatementReader(reader, skip_errors=True)
+        transactions = [t for batch in statement.iter_batches(IMPORT_BATCH_SIZE) for t in batch]
+
+    if not statement.iban:
+        raise ValueError("Statement does not contain an IBAN.")
+
+    return statement.iban, statement.name, transactions, statement.num_errors, statement.saldo
@@ -0,0 +1,175 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import transaction, connections
+from django.utils import timezone
+
+from transactions.importer import StatementReader, get_or_create_account, import_transactions, open_csv, \
+    parse_file, update_balance, IMPORT_BATCH_SIZE
+from transactions.models import ImportJob, ImportFile
+
+logger = logging.getLogger()
+
+
+def enqueue_import(data_uris: list[str]) -> ImportJob:
+    with transaction.atomic():
+        job = ImportJob.objects.create()
+        ImportFile.objects.bulk_create([
+            ImportFile(job=job, payload=data_uri) for data_uri in data_uris
+        ])
+
+    return job
+
+
+def requeue_running_jobs() -> int:
+    """
+    Reset jobs left running by a worker which was stopped or crashed, so they are processed again. Must only be called
+    while no other worker is running (e.g., when the only worker starts). Returns the number of jobs.
+    """
+    return ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING).update(
+        status=ImportJob.STATUS_PENDING,
+        date_started=None,
+    )
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it.
+
+    The conditional update makes sure a job is only claimed by one worker, even without row locks (e.g., on SQLite).
+    """
+    pending = ImportJob.objects.filter(status=ImportJob.STATUS_PENDING).order_by('date_created')
+
+    for job_id in pending.values_list('id', flat=True)[:10]:
+        claimed = ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_PENDING).update(
+            status=ImportJob.STATUS_RUNNING,
+            date_started=timezone.now(),
+        )
+
+        if claimed:
+            return ImportJob.objects.get(pk=job_id)
+
+    return None
+
+
+def process_file(import_file: ImportFile, batch_size: int = IMPORT_BATCH_SIZE):
+    """
+    Import a single file of a job.
+
+    Each batch is committed together with the progress counters, so the progress is visible to clients while the import
+    is running. Aborted imports are re-run safely (see ``requeue_running_jobs``) since existing transactions are
+    skipped. The file is read from the start again, so the counters of an aborted run are reset.
+    """
+    import_file.status = ImportJob.STATUS_RUNNING
+    import_file.num_parsed = 0
+    import_file.num_created = 0
+    import_file.num_skipped = 0
+    import_file.num_errors = 0
+    import_file.save(update_fields=['status', 'num_parsed', 'num_created', 'num_skipped', 'num_errors'])
+
+    with open_csv(import_file.payload) as reader:
+        statement = StatementReader(reader, skip_errors=True)
+
+        for batch in statement.iter_batches(batch_size):
+            with transaction.atomic():
+                if import_file.account is None:
+                    import_file.account = get_or_create_account(statement.iban, statement.name)
+
+                created, skipped = import_transactions(import_file.account, batch, batch_size=batch_size)
+
+                import_file.num_parsed += len(batch)
+                import_file.num_created += created
+                import_file.num_skipped += skipped
+                import_file.num_errors = statement.num_errors
+                import_file.save(update_fields=[
+                    'account', 'num_parsed', 'num_created', 'num_skipped', 'num_errors',
+                ])
+
+        if import_file.account is None:
+            import_file.account = get_or_create_account(statement.iban, statement.name)
+
+        update_balance(import_file.account, statement.saldo, statement.transactions_end)
+
+    import_file.num_errors = statement.num_errors
+    import_file.status = ImportJob.STATUS_DONE
+    import_file.payload = ""
+    import_file.save()
+
+
+def fail_file(import_file: ImportFile, error: Exception):
+    logger.error(f"Import of file {import_file.pk} failed: {error}")
+    import_file.status = ImportJob.STATUS_FAILED
+    import_file.error = str(error)
+    import_file.save(update_fields=['status', 'error'])
+
+
+def process_files_parallel(import_files: list[ImportFile], processes: int) -> bool:
+    """
+    Parse the files in a process pool and write all of them in one database transaction.
+
+    In contrast to ``process_file``, each file is held in memory as a whole until it has been written. Returns whether
+    all files were imported successfully.
+    """
+    ImportFile.objects.filter(pk__in=[f.pk for f in import_files]).update(status=ImportJob.STATUS_RUNNING)
+
+    # Do not share database connections with forked worker processes
+    connections.close_all()
+
+    parsed = []
+    failed = False
+    with ProcessPoolExecutor(max_workers=processes, initializer=django.setup) as executor:
+        futures = [executor.submit(parse_file, f.payload) for f in import_files]
+
+        for import_file, future in zip(import_files, futures):
+            try:
+                parsed.append((import_file, future.result()))
+            except Exception as e:
+                failed = True
+                fail_file(import_file, e)
+
+    try:
+        with transaction.atomic():
+            for import_file, (iban, name, transactions, num_errors, saldo) in parsed:
+                import_file.account = get_or_create_account(iban, name)
+                created, skipped = import_transactions(import_file.account, transactions)
+
+                transactions_end = max((t["booking_date"] for t in transactions), default=None)
+                update_balance(import_file.account, saldo, transactions_end)
+
+                import_file.num_parsed = len(transactions)
+                import_file.num_created = created
+                import_file.num_skipped = skipped
+                import_file.num_errors = num_errors
+                import_file.status = ImportJob.STATUS_DONE
+                import_file.payload = ""
+                import_file.save()
+    except Exception as e:
+        for import_file, _ in parsed:
+            fail_file(import_file, e)
+        return False
+
+    return not failed
+
+
+def process_job(job: ImportJob):
+    import_files = list(job.files.filter(status__in=[ImportJob.STATUS_PENDING, ImportJob.STATUS_RUNNING]))
+    processes = min(len(import_files), settings.IMPORT_PROCESSES)
+
+    if processes > 1:
+        failed = not process_files_parallel(import_files, processes)
+    else:
+        failed = False
+        for import_file in import_files:
+            try:
+                process_file(import_file)
+            except Exception as e:
+                failed = True
+                fail_file(import_file, e)
+
+    job.status = ImportJob.STATUS_FAILED if failed else ImportJob.STATUS_DONE
+    job.date_finished = timezone.now()
+    job.save(update_fields=['status', 'date_finished'])
+
+    logger.debug(f"Import job {job.pk} finished with status '{job.status}'")
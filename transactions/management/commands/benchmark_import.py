@@ -0,0 +1,84 @@
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management import BaseCommand
+
+from transactions.importer import StatementReader, IMPORT_BATCH_SIZE
+
+HEADER = [
+    ["Kontonummer", "1234567890"],
+    ["IBAN", "DE12 3456 7890 1234 5678 90"],
+    ["Kontoname", "Girokonto"],
+    [],
+    ["Saldo", "1.234,56 EUR"],
+    [],
+    ["Buchung", "Valuta", "Auftraggeber/Empfänger", "Buchungstext", "Verwendungszweck", "Saldo", "Währung", "Betrag",
+     "Währung"],
+]
+
+
+def generate_export(num_rows: int) -> str:
+    """Generate a synthetic CSV export with ``num_rows`` transactions, a few per day."""
+    rng = random.Random(0)
+    f = io.StringIO()
+    writer = csv.writer(f, delimiter=";", quoting=csv.QUOTE_ALL)
+    writer.writerows(HEADER)
+
+    booking_date = date(2000, 1, 1)
+    for i in range(num_rows):
+        if rng.random() < 0.3:
+            booking_date += timedelta(days=1)
+
+        value_date = booking_date + timedelta(days=rng.randint(0, 3))
+        amount = f"{rng.randint(-250000, 250000) / 100:_.2f}".replace(".", ",").replace("_", ".")
+        writer.writerow([
+            booking_date.strftime("%d.%m.%Y"),
+            value_date.strftime("%d.%m.%Y"),
+            f"Empfänger {rng.randint(0, 200)}",
+            "Lastschrift",
+            f"Verwendungszweck {i}",
+            "0,00",
+            "EUR",
+            amount,
+            "EUR",
+        ])
+
+    return f.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Compare row-wise and column-wise parsing of a synthetic CSV export"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        data = generate_export(options["rows"])
+        self.stdout.write(f"Generated export with {options['rows']} rows ({len(data) / 1e6:.1f} MB)")
+
+        def parse_rows():
+            return list(StatementReader(csv.reader(io.StringIO(data), delimiter=";")))
+
+        def parse_columns():
+            statement = StatementReader(csv.reader(io.StringIO(data), delimiter=";"))
+            return [t for batch in statement.iter_batches(IMPORT_BATCH_SIZE) for t in batch]
+
+        if parse_rows() != parse_columns():
+            raise AssertionError("Row-wise and column-wise parsing differ")
+
+        timings = {}
+        for name, parse in (("row-wise", parse_rows), ("column-wise", parse_columns)):
+            durations = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                parse()
+                durations.append(time.perf_counter() - start)
+
+            timings[name] = min(durations)
+            self.stdout.write(f"{name:>12}: {timings[name]:.3f}s")
+
+        self.stdout.write(f"Speedup: {timings['row-wise'] / timings['column-wise']:.2f}x")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management import BaseCommand
+
+from transactions.jobs import claim_next_job, process_job, requeue_running_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued CSV import jobs. Jobs left running by a previous worker are processed again."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+        parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds")
+
+    def handle(self, *args, **options):
+        # Only one worker processes the queue, running jobs have been aborted
+        requeued = requeue_running_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} aborted import job(s)")
+
+        while True:
+            job = claim_next_job()
+
+            if job is None:
+                if options["once"]:
+                    break
+
+                time.sleep(options["interval"])
+                continue
+
+            self.stdout.write(f"Processing import job {job.pk}")
+            process_job(job)
+            self.stdout.write(f"Import job {job.pk}: {job.status}")
@@ -0,0 +1,210 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from finance.models import Record, Contract
+from finance.schedule import get_month_index, get_payment_day, iter_payment_dates
+from transactions.models import Transaction
+
+# Maximum distance in days between the booking date of a transaction and the date of a record or contract payment
+MATCH_WINDOW_DAYS = 7
+
+MAX_SUGGESTIONS = 5
+
+# Minimum score of the best suggestion for it to be applied automatically
+AUTO_APPLY_SCORE = 0.75
+
+# Number of amounts per query when loading candidate records
+AMOUNT_CHUNK_SIZE = 500
+
+
+def to_cents(amount) -> int:
+    """Absolute amount in cents, the key of the indexes. Records and transactions may use different signs."""
+    return round(abs(float(amount)) * 100)
+
+
+def get_booking_day(t: Transaction) -> date:
+    return timezone.localtime(t.booking_date).date()
+
+
+def get_similarity(subject: str, t: Transaction) -> float:
+    subject = subject.lower()
+    return max(
+        SequenceMatcher(None, subject, text.lower()).ratio()
+        for text in (t.creditor, t.purpose)
+    )
+
+
+def get_date_score(days: int) -> float:
+    return 1 - abs(days) / (MATCH_WINDOW_DAYS + 1)
+
+
+def get_payment_dates(contract: Contract, around: date) -> list[date]:
+    """Payment dates of ``contract`` in the month of ``around`` and its neighbours, like in the forecast."""
+    month_index = get_month_index(around)
+    date_from = get_payment_day(month_index - 1, 1)
+    date_to = get_payment_day(month_index + 1, 31)
+    return list(iter_payment_dates(contract, date_from, date_to))
+
+
+class RecordIndex:
+    """
+    Records by their absolute amount in cents, each bucket sorted by date.
+
+    Finding the candidates of a transaction is a dictionary lookup and a binary search for the date window instead of
+    a scan over all records.
+    """
+
+    def __init__(self, records):
+        buckets = defaultdict(list)
+        for record in records:
+            buckets[to_cents(record.amount)].append(record)
+
+        self.records = {}
+        self.dates = {}
+        for cents, bucket in buckets.items():
+            bucket.sort(key=lambda r: (r.date, r.pk))
+            self.records[cents] = bucket
+            self.dates[cents] = [r.date for r in bucket]
+
+    def find(self, amount, day: date, window: int = MATCH_WINDOW_DAYS) -> list[Record]:
+        cents = to_cents(amount)
+        dates = self.dates.get(cents)
+        if not dates:
+            return []
+
+        lo = bisect_left(dates, day - timedelta(days=window))
+        hi = bisect_right(dates, day + timedelta(days=window))
+        return self.records[cents][lo:hi]
+
+
+class ContractIndex:
+    """Active contracts with a payment date by their absolute amount in cents."""
+
+    def __init__(self, contracts):
+        self.contracts = defaultdict(list)
+        for contract in contracts:
+            if contract.payment_date is not None:
+                self.contracts[to_cents(contract.amount)].append(contract)
+
+    def find(self, amount, day: date, window: int = MATCH_WINDOW_DAYS) -> list[tuple[Contract, int]]:
+        """Contracts with the amount and a payment date within ``window``, along with the distance in days."""
+        matches = []
+        for contract in self.contracts.get(to_cents(amount), []):
+            days = min((abs((d - day).days) for d in get_payment_dates(contract, day)), default=None)
+            if days is not None and days <= window:
+                matches.append((contract, days))
+        return matches
+
+
+def load_record_index(transactions: list[Transaction]) -> RecordIndex:
+    """Load the records without transactions which could match any of ``transactions``."""
+    if not transactions:
+        return RecordIndex([])
+
+    days = [get_booking_day(t) for t in transactions]
+    date_range = (min(days) - timedelta(days=MATCH_WINDOW_DAYS), max(days) + timedelta(days=MATCH_WINDOW_DAYS))
+
+    # Both signs, the sign convention of records is up to the user
+    amounts = sorted({sign * abs(float(t.amount)) for t in transactions for sign in (1, -1)})
+
+    linked = Transaction.records.through.objects.filter(record=OuterRef('pk'))
+    records = []
+    for i in range(0, len(amounts), AMOUNT_CHUNK_SIZE):
+        records.extend(
+            Record.objects
+            .filter(amount__in=amounts[i:i + AMOUNT_CHUNK_SIZE], date__range=date_range)
+            .filter(~Exists(linked))
+            .order_by()
+        )
+
+    return RecordIndex(records)
+
+
+def suggest(transactions: list[Transaction], limit: int = MAX_SUGGESTIONS) -> list[dict]:
+    """
+    Suggest records to link and contracts to create records from for each of ``transactions``.
+
+    Candidates must have the same absolute amount and a date within ``MATCH_WINDOW_DAYS``. They are scored by date
+    proximity and, for records, the similarity of the subject to creditor or purpose. Uses two queries, regardless of
+    the number of transactions.
+    """
+    records = load_record_index(transactions)
+    contracts = ContractIndex(Contract.objects.filter(is_active=True).order_by())
+
+    suggestions = []
+    for t in transactions:
+        day = get_booking_day(t)
+
+        record_scores = sorted(
+            (
+                (round((get_date_score((r.date - day).days) + get_similarity(r.subject, t)) / 2, 3), r)
+                for r in records.find(t.amount, day)
+            ),
+            key=lambda item: (-item[0], item[1].pk),
+        )
+        contract_scores = sorted(
+            (
+                (round((get_date_score(days) + get_similarity(c.name, t)) / 2, 3), c)
+                for c, days in contracts.find(t.amount, day)
+            ),
+            key=lambda item: (-item[0], item[1].pk),
+        )
+
+        suggestions.append(dict(
+            transaction=t,
+            records=record_scores[:limit],
+            contracts=contract_scores[:limit],
+        ))
+
+    return suggestions
+
+
+def create_record_from_contract(contract: Contract, t: Transaction) -> Record:
+    return Record.objects.create(
+        account_id=contract.account_id,
+        subject=contract.name,
+        category_id=contract.category_id,
+        contract=contract,
+        date=get_booking_day(t),
+        amount=contract.amount,
+    )
+
+
+def apply_suggestions(suggestions: list[dict], create_records: bool = False) -> dict:
+    """
+    Link each transaction to its best record, if the score reaches ``AUTO_APPLY_SCORE``. With ``create_records``,
+    transactions without such a record get a new record from their best contract instead.
+
+    A record is linked to one transaction at most. Returns the number of linked and created records.
+    """
+    used = set()
+    links = []
+    num_created = 0
+
+    with transaction.atomic():
+        for suggestion in suggestions:
+            t = suggestion["transaction"]
+            record = next(
+                (r for score, r in suggestion["records"] if score >= AUTO_APPLY_SCORE and r.pk not in used),
+                None,
+            )
+
+            if record is None and create_records:
+                contract = next((c for score, c in suggestion["contracts"] if score >= AUTO_APPLY_SCORE), None)
+                if contract is not None:
+                    record = create_record_from_contract(contract, t)
+                    num_created += 1
+
+            if record is not None:
+                used.add(record.pk)
+                links.append(Transaction.records.through(transaction_id=t.pk, record_id=record.pk))
+
+        Transaction.records.through.objects.bulk_create(links)
+
+    return dict(linked=len(links), created=num_created)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_alter_record_category'),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'booking_date'], name='transaction_account_5dbf2d_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_transaction_account_booking_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('running', 'Läuft'), ('done', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=16)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_started', models.DateTimeField(blank=True, null=True)),
+                ('date_finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('date_created',),
+                'indexes': [models.Index(fields=['status', 'date_created'], name='transaction_status_adec35_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('running', 'Läuft'), ('done', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=16)),
+                ('error', models.TextField(blank=True)),
+                ('num_parsed', models.PositiveIntegerField(default=0)),
+                ('num_created', models.PositiveIntegerField(default=0)),
+                ('num_skipped', models.PositiveIntegerField(default=0)),
+                ('num_errors', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='transactions.account')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='transactions.importjob')),
+            ],
+            options={
+                'ordering': ('job', 'id'),
+            },
+        ),
+    ]
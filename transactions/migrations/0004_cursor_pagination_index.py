@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_cursor_pagination_index'),
+        ('transactions', '0003_importjob_importfile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['booking_date', 'id'], name='transaction_booking_e1a363_idx'),
+        ),
+    ]
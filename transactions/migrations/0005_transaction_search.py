@@ -0,0 +1,65 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE transactions_transaction ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('german', coalesce(creditor, '') || ' ' || coalesce(purpose, ''))) STORED",
+    "CREATE INDEX transactions_transaction_search_idx ON transactions_transaction USING gin (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS transactions_transaction_search_idx",
+    "ALTER TABLE transactions_transaction DROP COLUMN IF EXISTS search_vector",
+]
+
+# External content FTS5 table, kept in sync with triggers (see https://www.sqlite.org/fts5.html)
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE transactions_transaction_fts USING fts5("
+    "creditor, purpose, content='transactions_transaction', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER transactions_transaction_fts_insert AFTER INSERT ON transactions_transaction BEGIN "
+    "INSERT INTO transactions_transaction_fts(rowid, creditor, purpose) "
+    "VALUES (new.id, new.creditor, new.purpose); END",
+    "CREATE TRIGGER transactions_transaction_fts_delete AFTER DELETE ON transactions_transaction BEGIN "
+    "INSERT INTO transactions_transaction_fts(transactions_transaction_fts, rowid, creditor, purpose) "
+    "VALUES ('delete', old.id, old.creditor, old.purpose); END",
+    "CREATE TRIGGER transactions_transaction_fts_update AFTER UPDATE ON transactions_transaction BEGIN "
+    "INSERT INTO transactions_transaction_fts(transactions_transaction_fts, rowid, creditor, purpose) "
+    "VALUES ('delete', old.id, old.creditor, old.purpose); "
+    "INSERT INTO transactions_transaction_fts(rowid, creditor, purpose) "
+    "VALUES (new.id, new.creditor, new.purpose); END",
+    "INSERT INTO transactions_transaction_fts(transactions_transaction_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS transactions_transaction_fts_insert",
+    "DROP TRIGGER IF EXISTS transactions_transaction_fts_delete",
+    "DROP TRIGGER IF EXISTS transactions_transaction_fts_update",
+    "DROP TABLE IF EXISTS transactions_transaction_fts",
+]
+
+
+def run_for_vendor(postgres_statements, sqlite_statements):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres_statements,
+            'sqlite': sqlite_statements,
+        }.get(schema_editor.connection.vendor, [])
+
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_cursor_pagination_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
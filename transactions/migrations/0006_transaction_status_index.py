@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_record_amount_date_index'),
+        ('transactions', '0005_transaction_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['is_ignored', 'booking_date'], name='transaction_is_igno_cd700d_idx'),
+        ),
+    ]
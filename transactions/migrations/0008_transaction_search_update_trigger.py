@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Only updates of the indexed columns need to replace the FTS row, not e.g. flags like is_ignored
+UPDATE_TRIGGER = (
+    "CREATE TRIGGER transactions_transaction_fts_update AFTER UPDATE {columns}ON transactions_transaction BEGIN "
+    "INSERT INTO transactions_transaction_fts(transactions_transaction_fts, rowid, creditor, purpose) "
+    "VALUES ('delete', old.id, old.creditor, old.purpose); "
+    "INSERT INTO transactions_transaction_fts(rowid, creditor, purpose) "
+    "VALUES (new.id, new.creditor, new.purpose); END"
+)
+
+
+def replace_update_trigger(columns: str):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+
+        schema_editor.execute("DROP TRIGGER IF EXISTS transactions_transaction_fts_update")
+        schema_editor.execute(UPDATE_TRIGGER.format(columns=columns))
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_balance_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            replace_update_trigger("OF creditor, purpose "),
+            replace_update_trigger(""),
+        ),
+    ]
@@ -5,10 +5,62 @@ class Account(models.Model):
     iban = models.CharField(max_length=22)
     name = models.CharField(max_length=1024)
 
+    # Balance before the first transaction, derived from the balance ("Saldo") of imported statements
+    opening_balance = models.DecimalField(decimal_places=2, max_digits=12, null=True, blank=True)
+
     def __str__(self):
         return self.iban
 
 
+class TransactionQuerySet(models.QuerySet):
+    STATUS_NEW = "new"
+    STATUS_IMPORTED = "imported"
+    STATUS_IGNORED = "ignored"
+
+    def with_status(self):
+        """Annotate ``has_records``, which is used by ``is_new`` and ``is_imported`` instead of a query per object."""
+        return self.annotate(
+            has_records=models.Exists(
+                self.model.records.through.objects.filter(transaction=models.OuterRef('pk')),
+            ),
+        )
+
+    def new(self):
+        return self.with_status().filter(is_ignored=False, has_records=False)
+
+    def imported(self):
+        return self.with_status().filter(is_ignored=False, has_records=True)
+
+    def ignored(self):
+        return self.filter(is_ignored=True)
+
+    def filter_status(self, status: str):
+        statuses = {
+            self.STATUS_NEW: self.new,
+            self.STATUS_IMPORTED: self.imported,
+            self.STATUS_IGNORED: self.ignored,
+        }
+
+        if status not in statuses:
+            raise ValueError(f"Status '{status}' does not exist.")
+
+        return statuses[status]()
+
+    def delete(self):
+        # Invalidate the balance snapshots once per account, from the earliest deleted booking date on. Cascading
+        # deletes of accounts bypass this, but delete their snapshots as well.
+        from transactions.balances import invalidate_snapshots  # balances imports the models
+
+        earliest = self.order_by().values('account').annotate(first=models.Min('booking_date'))
+        earliest = list(earliest.values_list('account', 'first'))
+
+        result = super().delete()
+        for account_id, booking_date in earliest:
+            invalidate_snapshots(account_id, booking_date)
+
+        return result
+
+
 class Transaction(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE)
 
@@ -28,13 +80,97 @@ class Transaction(models.Model):
 
     records = models.ManyToManyField('finance.Record', related_name='transactions')
 
+    objects = TransactionQuerySet.as_manager()
+
+    def delete(self, *args, **kwargs):
+        from transactions.balances import invalidate_snapshots  # balances imports the models
+
+        result = super().delete(*args, **kwargs)
+        invalidate_snapshots(self.account_id, self.booking_date)
+        return result
+
+    def get_has_records(self) -> bool:
+        # Prefer the annotation of TransactionQuerySet.with_status() or prefetched records over a query
+        if hasattr(self, 'has_records'):
+            return self.has_records
+        if 'records' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.records.all()) > 0
+        return self.records.exists()
+
     @property
     def is_new(self):
-        return not self.records.exists() and not self.is_ignored
+        return not self.is_ignored and not self.get_has_records()
 
     @property
     def is_imported(self):
-        return self.records.exists() and not self.is_ignored
+        return not self.is_ignored and self.get_has_records()
 
     class Meta:
         ordering = ('booking_date',)
+        indexes = [
+            models.Index(fields=['account', 'booking_date']),
+            models.Index(fields=['booking_date', 'id']),
+            models.Index(fields=['is_ignored', 'booking_date']),
+        ]
+
+
+class ImportJob(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Wartend"),
+        (STATUS_RUNNING, "Läuft"),
+        (STATUS_DONE, "Fertig"),
+        (STATUS_FAILED, "Fehlgeschlagen"),
+    )
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('date_created',)
+        indexes = [
+            models.Index(fields=['status', 'date_created']),
+        ]
+
+
+class ImportFile(models.Model):
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='files')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True)
+
+    # Data URI of the uploaded CSV file, cleared once the file has been imported
+    payload = models.TextField(blank=True)
+
+    status = models.CharField(max_length=16, choices=ImportJob.STATUS_CHOICES, default=ImportJob.STATUS_PENDING)
+    error = models.TextField(blank=True)
+
+    # Progress
+    num_parsed = models.PositiveIntegerField(default=0)
+    num_created = models.PositiveIntegerField(default=0)
+    num_skipped = models.PositiveIntegerField(default=0)
+    num_errors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('job', 'id')
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Sum of all transactions of an account booked before ``date`` (the first day of a month).
+
+    Checkpoints for the balance time series (see transactions.balances), deleted from the booking date of newly
+    imported transactions onward.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='balance_snapshots')
+    date = models.DateField()
+    total = models.DecimalField(decimal_places=2, max_digits=12)
+
+    class Meta:
+        ordering = ('account', 'date')
+        unique_together = ('account', 'date')
@@ -0,0 +1,62 @@
+import re
+
+from django.db import connection
+from django.db.models import QuerySet, Q, FloatField, BooleanField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "german"
+
+
+def to_fts5_query(query: str) -> str:
+    """Match all terms of the query as prefixes, quoted so user input cannot break the FTS5 query syntax."""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_transactions(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filter ``queryset`` by a full-text search on creditor and purpose and order it by relevance (``rank``).
+
+    Uses the generated ``search_vector`` column on Postgres and the FTS5 table on SQLite (see migration 0005). Other
+    databases fall back to substring matching without ranking.
+    """
+    if connection.vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        queryset = queryset.alias(
+            matches=RawSQL(
+                f"transactions_transaction.search_vector @@ {tsquery}",
+                [SEARCH_CONFIG, query],
+                output_field=BooleanField(),
+            ),
+        ).filter(matches=True).annotate(
+            rank=RawSQL(
+                f"ts_rank(transactions_transaction.search_vector, {tsquery})",
+                [SEARCH_CONFIG, query],
+                output_field=FloatField(),
+            ),
+        )
+    elif connection.vendor == 'sqlite':
+        fts_query = to_fts5_query(query)
+        if not fts_query:
+            return queryset.none()
+
+        # bm25() is lower for better matches
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                "SELECT rowid FROM transactions_transaction_fts WHERE transactions_transaction_fts MATCH %s",
+                [fts_query],
+            ),
+        ).annotate(
+            rank=RawSQL(
+                "SELECT -bm25(transactions_transaction_fts) FROM transactions_transaction_fts "
+                "WHERE transactions_transaction_fts MATCH %s AND rowid = transactions_transaction.id",
+                [fts_query],
+                output_field=FloatField(),
+            ),
+        )
+    else:
+        queryset = queryset.filter(Q(creditor__icontains=query) | Q(purpose__icontains=query)).annotate(
+            rank=Value(0.0, output_field=FloatField()),
+        )
+
+    return queryset.order_by('-rank', '-booking_date', '-id')
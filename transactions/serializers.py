@@ -1,7 +1,13 @@
 from rest_framework import serializers
 
 from finance.serializers import RecordSerializer
-from transactions.models import Transaction
+from transactions.models import Transaction, ImportJob, ImportFile, Account
+
+
+class AccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Account
+        fields = '__all__'
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -11,3 +17,19 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
+
+
+class ImportFileSerializer(serializers.ModelSerializer):
+    account = serializers.StringRelatedField()
+
+    class Meta:
+        model = ImportFile
+        exclude = ('job', 'payload')
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    files = ImportFileSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = '__all__'
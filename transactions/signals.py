@@ -0,0 +1,35 @@
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+
+from backend.signals import is_updating, remember_stored_state, get_state
+from transactions.balances import invalidate_snapshots
+from transactions.models import Transaction
+
+# Fields of a transaction included in the balance snapshots. Deletes are handled by Transaction.delete() and
+# TransactionQuerySet.delete(), a post_delete receiver would prevent fast deletes of the transactions of an account.
+BALANCE_FIELDS = ('account_id', 'booking_date', 'amount')
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_balance_state(sender, instance: Transaction, update_fields=None, **kwargs):
+    # Snapshots of the previous account and booking date are invalidated as well. Saves of other fields, e.g. hiding a
+    # transaction, do not need the stored state.
+    if is_updating(instance, BALANCE_FIELDS, update_fields):
+        remember_stored_state(instance, BALANCE_FIELDS)
+
+
+@receiver(post_save, sender=Transaction)
+def invalidate_snapshots_on_save(sender, instance: Transaction, update_fields=None, **kwargs):
+    if not is_updating(instance, BALANCE_FIELDS, update_fields):
+        return
+
+    old = instance._stored_state
+    new = get_state(instance, BALANCE_FIELDS)
+
+    if old == new:
+        return
+
+    if old is not None:
+        invalidate_snapshots(old['account_id'], old['booking_date'])
+
+    invalidate_snapshots(new['account_id'], new['booking_date'])
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from finance import models as finance_models
+from transactions.models import Account, Transaction
+
+
+class TransactionListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create(iban="DE00TEST", name="Giro")
+        finance_account = finance_models.Account.objects.create(name="Giro", type="Girokonto")
+        booking_date = timezone.make_aware(datetime(2024, 1, 1))
+
+        for i in range(60):
+            t = Transaction.objects.create(
+                account=account,
+                booking_date=booking_date + timedelta(days=i),
+                value_date=booking_date + timedelta(days=i),
+                creditor=f"Empfänger {i}",
+                amount=-i,
+                currency="EUR",
+                transaction_type="Lastschrift",
+                purpose=f"Verwendungszweck {i}",
+            )
+            if i % 2 == 0:
+                t.records.add(finance_models.Record.objects.create(
+                    account=finance_account,
+                    subject=f"Buchung {i}",
+                    date=date(2024, 1, 1) + timedelta(days=i),
+                    amount=-i,
+                ))
+
+        cls.user = User.objects.create(username="test")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        # Savepoint of the atomic request, transactions with their account, records, transactions of the records and
+        # release
+        for page_size in (5, 50):
+            params = {"pagination": "cursor", "pageSize": page_size}
+            with self.subTest(page_size=page_size), self.assertNumQueries(5):
+                response = self.client.get("/v1/transactions/transactions/", params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_fast_cursor_pages_match_serializer(self):
+        # The cursor position is read from the account column, which is not part of the encoded rows
+        params = {"pagination": "cursor", "pageSize": 20, "sortBy": "account"}
+        response = self.client.get("/v1/transactions/transactions/", params)
+        fast_response = self.client.get("/v1/transactions/transactions/", dict(params, fast=1))
+        self.assertEqual(fast_response.status_code, 200)
+        self.assertEqual(json.loads(fast_response.content)["results"], response.json()["results"])
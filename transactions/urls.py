@@ -16,11 +16,13 @@ Including another URLconf
 """
 from rest_framework import routers
 
-from transactions.views import TransactionViewSet
+from transactions.views import TransactionViewSet, ImportJobViewSet, AccountViewSet
 
 app_name = 'transactions'
 
 router = routers.DefaultRouter()
 router.register(r'transactions', TransactionViewSet)
+router.register(r'imports', ImportJobViewSet)
+router.register(r'accounts', AccountViewSet)
 
 urlpatterns = router.urls
@@ -1,87 +1,60 @@
-import csv
 import logging
-from datetime import datetime
-from io import StringIO
-from urllib.request import urlopen
+from datetime import date, datetime
 
+from dateutil.relativedelta import relativedelta
 from django.db import transaction
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError, APIException
+from rest_framework.exceptions import ValidationError, APIException, NotFound
 from rest_framework.response import Response
 
+from finance.encoders import FastListMixin, ExportMixin
 from finance.models import Record
-from transactions.models import Transaction, Account
-from transactions.serializers import TransactionSerializer
+from finance.pagination import CursorPaginationMixin, TransactionCursorPagination, StandardResultsSetPagination
+from finance.serializers import prefetch_for_serializer
+from transactions.balances import get_balances
+from transactions.encoders import TRANSACTION_FIELDS, encode_transactions
+from transactions.jobs import enqueue_import
+from transactions.matching import suggest, apply_suggestions
+from transactions.models import Transaction, ImportJob, Account
+from transactions.search import search_transactions
+from transactions.serializers import TransactionSerializer, ImportJobSerializer, AccountSerializer
 
 logger = logging.getLogger()
 
 
-def import_csv(reader: csv.reader):
-    reading_payload = False
-    contains_saldo = False
-
-    iban = None
-    name = None
-
-    transactions = []
-    for row in reader:
-        if not row:
-            continue
-
-        if row[0] == "IBAN":
-            iban = row[1].replace(" ", "").strip()
-
-        if row[0] == "Kontoname":
-            name = row[1]
-
-        if row[0] == "Saldo":
-            contains_saldo = True
-            logger.debug("File contains 'Saldo'")
-
-        if row[0] == "Buchung":
-            reading_payload = True
-            continue
+class TransactionViewSet(ExportMixin, FastListMixin, CursorPaginationMixin, viewsets.ModelViewSet):
+    queryset = Transaction.objects.all()
+    serializer_class = TransactionSerializer
+    cursor_pagination_class = TransactionCursorPagination
+    fast_fields = TRANSACTION_FIELDS
 
-        if reading_payload:
-            amount_str = row[7] if contains_saldo else row[5]
-            currency = row[8] if contains_saldo else row[6]
+    def get_queryset(self):
+        qs = prefetch_for_serializer(super().get_queryset(), self.get_serializer_class())
 
-            transactions.append(dict(
-                booking_date=datetime.strptime(row[0], "%d.%m.%Y"),
-                value_date=datetime.strptime(row[1], "%d.%m.%Y"),
-                creditor=row[2],
-                transaction_type=row[3],
-                purpose=row[4],
-                amount=float(amount_str.replace(".", "").replace(",", ".")),
-                currency=currency,
-            ))
+        transaction_status = self.request.query_params.get("status")
+        if transaction_status:
+            try:
+                qs = qs.filter_status(transaction_status)
+            except ValueError as e:
+                raise ValidationError(str(e))
 
-    with transaction.atomic():
-        try:
-            account = Account.objects.get(iban=iban)
-        except Account.DoesNotExist:
-            account = Account.objects.create(
-                iban=iban,
-                name=name,
-            )
+        return qs
 
-        num_created = 0
-        for transaction_dict in transactions:
-            _, created = Transaction.objects.get_or_create(
-                account=account,
-                **transaction_dict,
-            )
+    def encode_rows(self, rows):
+        return encode_transactions(rows)
 
-            if created:
-                num_created += 1
+    @action(detail=False)
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError("Search query 'q' is missing.")
 
-        logger.debug(f"Done. Added {num_created}/{len(transactions)} transactions")
+        transactions = search_transactions(self.get_queryset(), query)
 
-
-class TransactionViewSet(viewsets.ModelViewSet):
-    queryset = Transaction.objects.all()
-    serializer_class = TransactionSerializer
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(transactions, request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
 
     @action(methods=["POST"], detail=True)
     def hide(self, request, pk=None):
@@ -91,7 +64,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
             raise APIException("Transaction is imported.")
 
         t.is_ignored = True
-        t.save()
+        t.save(update_fields=['is_ignored'])
 
         return Response(data=TransactionSerializer(t).data)
 
@@ -103,7 +76,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
             raise APIException("Transaction is not ignored.")
 
         t.is_ignored = False
-        t.save()
+        t.save(update_fields=['is_ignored'])
 
         return Response(data=TransactionSerializer(t).data)
 
@@ -111,16 +84,103 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def bookmark(self, request, pk=None):
         t = Transaction.objects.get(pk=pk)
         t.is_highlighted = True
-        t.save()
+        t.save(update_fields=['is_highlighted'])
         return Response(data=TransactionSerializer(t).data)
 
     @action(methods=["POST"], detail=True)
     def unbookmark(self, request, pk=None):
         t = Transaction.objects.get(pk=pk)
         t.is_highlighted = False
-        t.save()
+        t.save(update_fields=['is_highlighted'])
         return Response(data=TransactionSerializer(t).data)
 
+    def get_bulk_transactions(self, ids) -> dict:
+        """
+        Validate a list of transaction IDs and return the transactions by ID, with ``has_records`` annotated, using a
+        single query.
+        """
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError("Expected a list of transaction IDs.")
+
+        transactions = Transaction.objects.filter(pk__in=ids).with_status().only('id', 'is_ignored').in_bulk()
+
+        missing = sorted(set(ids).difference(transactions))
+        if missing:
+            raise NotFound(f"Transactions {missing} do not exist.")
+
+        return transactions
+
+    def bulk_response(self, ids):
+        transactions = self.get_queryset().filter(pk__in=ids)
+        return Response(data=self.get_serializer(transactions, many=True).data)
+
+    def bulk_update(self, request, **values):
+        transactions = self.get_bulk_transactions(request.data)
+        Transaction.objects.filter(pk__in=transactions).update(**values)
+        return self.bulk_response(transactions)
+
+    @action(methods=["POST"], detail=False, url_path="hide")
+    def bulk_hide(self, request):
+        transactions = self.get_bulk_transactions(request.data)
+
+        imported = sorted(pk for pk, t in transactions.items() if t.is_imported)
+        if imported:
+            raise APIException(f"Transactions {imported} are imported.")
+
+        Transaction.objects.filter(pk__in=transactions).update(is_ignored=True)
+        return self.bulk_response(transactions)
+
+    @action(methods=["POST"], detail=False, url_path="show")
+    def bulk_show(self, request):
+        transactions = self.get_bulk_transactions(request.data)
+
+        not_ignored = sorted(pk for pk, t in transactions.items() if not t.is_ignored)
+        if not_ignored:
+            raise APIException(f"Transactions {not_ignored} are not ignored.")
+
+        Transaction.objects.filter(pk__in=transactions).update(is_ignored=False)
+        return self.bulk_response(transactions)
+
+    @action(methods=["POST"], detail=False, url_path="bookmark")
+    def bulk_bookmark(self, request):
+        return self.bulk_update(request, is_highlighted=True)
+
+    @action(methods=["POST"], detail=False, url_path="unbookmark")
+    def bulk_unbookmark(self, request):
+        return self.bulk_update(request, is_highlighted=False)
+
+    @action(methods=["POST"], detail=False, url_path="records")
+    def bulk_records(self, request):
+        """Set the records of several transactions, given as ``{transaction_id: [record_id, ...], ...}``."""
+        if not isinstance(request.data, dict):
+            raise ValidationError("Expected record IDs by transaction ID.")
+
+        try:
+            links = {int(pk): set(record_ids) for pk, record_ids in request.data.items()}
+        except (TypeError, ValueError):
+            raise ValidationError("Expected record IDs by transaction ID.")
+
+        if not all(isinstance(pk, int) for record_ids in links.values() for pk in record_ids):
+            raise ValidationError("Expected record IDs by transaction ID.")
+
+        transactions = self.get_bulk_transactions(list(links))
+
+        record_ids = set().union(*links.values())
+        missing = sorted(record_ids.difference(Record.objects.filter(pk__in=record_ids).values_list('pk', flat=True)))
+        if missing:
+            raise NotFound(f"Records {missing} do not exist.")
+
+        through = Transaction.records.through
+        with transaction.atomic():
+            through.objects.filter(transaction__in=transactions).delete()
+            through.objects.bulk_create([
+                through(transaction_id=pk, record_id=record_id)
+                for pk, record_ids in links.items()
+                for record_id in record_ids
+            ])
+
+        return self.bulk_response(transactions)
+
     @action(methods=["POST"], detail=False)
     def counter_booking(self, request, pk=None):
         if len(request.data) != 2:
@@ -138,8 +198,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
         tr_a.is_counter_to = tr_b
         tr_b.is_counter_to = tr_a
 
-        tr_a.save()
-        tr_b.save()
+        tr_a.save(update_fields=['is_counter_to'])
+        tr_b.save(update_fields=['is_counter_to'])
 
         return Response(status=200)
 
@@ -151,21 +211,84 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
         return Response(data=TransactionSerializer(t).data)
 
+    @action(methods=["GET", "POST"], detail=False)
+    def suggestions(self, request):
+        """
+        Suggest records and contracts for new transactions (all, or the IDs in ``?transactions=1,2``).
+
+        POST links the transactions to their best matching record. With ``{"createRecords": true}``, records are
+        created from matching contracts for transactions without a matching record.
+        """
+        transactions = Transaction.objects.new()
+
+        ids = request.query_params.get("transactions")
+        if ids:
+            try:
+                transactions = transactions.filter(pk__in=[int(pk) for pk in ids.split(",")])
+            except ValueError:
+                raise ValidationError("Transactions must be a comma-separated list of IDs.")
+
+        suggestions = suggest(list(transactions))
+
+        if request.method == "POST":
+            create_records = request.data.get("createRecords", False) if isinstance(request.data, dict) else False
+            return Response(data=apply_suggestions(suggestions, create_records=bool(create_records)))
+
+        return Response(data=[
+            dict(
+                transaction=s["transaction"].pk,
+                records=[
+                    dict(id=r.pk, subject=r.subject, date=r.date, amount=r.amount, score=score)
+                    for score, r in s["records"]
+                ],
+                contracts=[
+                    dict(id=c.pk, name=c.name, amount=c.amount, score=score)
+                    for score, c in s["contracts"]
+                ],
+            )
+            for s in suggestions
+        ])
+
     @action(methods=["POST"], detail=False, url_path="import")
     def import_csv(self, request, pk=None):
         logger.debug(f"Process files: {request.data}")
 
         # Except: CSV file with delimiter ";"
-        if not isinstance(request.data, list):
+        if not isinstance(request.data, list) or not all(isinstance(data_uri, str) for data_uri in request.data):
             raise ValidationError()
 
-        with transaction.atomic():
-            for data_uri in request.data:
-                with urlopen(data_uri) as response:
-                    data = response.read()
+        # Files are imported by the worker (see management command 'process_imports')
+        job = enqueue_import(request.data)
+
+        return Response(data=ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ImportJob.objects.prefetch_related('files__account')
+    serializer_class = ImportJobSerializer
 
-                f = StringIO(data.decode("iso-8859-1"))
-                reader = csv.reader(f, delimiter=";")
-                import_csv(reader)
 
-        return Response(status=204)
+class AccountViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Account.objects.all()
+    serializer_class = AccountSerializer
+
+    @action(detail=True)
+    def balance(self, request, pk=None):
+        """
+        Balance at the end of each day (``?period=day``, default) or month (``?period=month``) with transactions from
+        ``from`` (default: one year ago) to ``to`` (default: today).
+        """
+        try:
+            date_to = date.fromisoformat(request.query_params.get("to") or datetime.now().date().isoformat())
+            date_from = date.fromisoformat(
+                request.query_params.get("from") or (date_to - relativedelta(years=1)).isoformat()
+            )
+        except ValueError:
+            raise ValidationError("Dates must be in the format YYYY-MM-DD.")
+
+        try:
+            rows = get_balances(self.get_object(), date_from, date_to, request.query_params.get("period", "day"))
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        return Response(data=rows)